@@ -8,19 +8,15 @@ app = Celery('modo')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-app.autodiscover_tasks()
+app.autodiscover_tasks(['news.management'])
 
 app.conf.beat_schedule = {
     'pull_articles': {
-        'task': 'modo.news.management.tasks.pull_articles',
-        'schedule': crontab(hour='*/2')
+        'task': 'news.pull_articles',
+        'schedule': crontab(minute=0, hour='*/2')
     },
     'update_sources': {
-        'task': 'modo.news.management.tasks.update_sources',
-        'schedule': crontab(day_of_month=1)
-    },
-    'show_time': {
-        'task': 'modo.news.management.tasks.show_time',
-        'schedule': 10
+        'task': 'news.update_sources',
+        'schedule': crontab(minute=0, hour=0, day_of_month=1)
     },
 }
@@ -130,6 +130,26 @@ DATABASES = {
     }
 }
 
+# Caches
+# Feed pages, their generation and render locks are shared by the web and Celery processes,
+# so the default cache must be one they all reach, not a per-process local memory cache.
+# The database cache needs its table: python manage.py createcachetable
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://modo_cache'),
+    # Culled down to NEWS_EXTRACTION_CACHE_MAX_ENTRIES, so kept apart from the default cache.
+    'extraction': env.cache('EXTRACTION_CACHE_URL', default='dbcache://modo_extraction_cache'),
+}
+
+CELERY_BROKER_URL = env('BROKER_URL')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND')
+
+# Prefork worker children are daemonic and may not start processes, so they analyze articles in threads
+# that share the GIL. Set NEWS_INGEST_QUEUE to route ingestion to a worker that runs the NLP process pool:
+#     celery -A modo worker -Q ingest --pool=solo
+NEWS_INGEST_QUEUE = env('NEWS_INGEST_QUEUE', default=None)
+CELERY_TASK_ROUTES = {'news.ingest_headlines': {'queue': NEWS_INGEST_QUEUE}} if NEWS_INGEST_QUEUE else {}
+
 # CELERY_BROKER_URL = "sqs://{}:{}@".format(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY)
 # CELERY_ACCEPT_CONTENT = ['application/json']
 # CELERY_RESULT_SERIALIZER = 'json'
@@ -142,6 +162,44 @@ DATABASES = {
 #     'polling_interval': 20,
 # }
 
+# News ingestion
+NEWS_POLL_WORKERS = env.int('NEWS_POLL_WORKERS', default=4)
+NEWS_POLL_RATE = env.float('NEWS_POLL_RATE', default=5.0)
+NEWS_POLL_TIMEOUT = env.float('NEWS_POLL_TIMEOUT', default=10.0)
+NEWS_POLL_RETRIES = env.int('NEWS_POLL_RETRIES', default=3)
+NEWS_POLL_MIN_INTERVAL = env.int('NEWS_POLL_MIN_INTERVAL', default=2 * 60 * 60)
+NEWS_POLL_MAX_INTERVAL = env.int('NEWS_POLL_MAX_INTERVAL', default=24 * 60 * 60)
+NEWS_FETCH_WORKERS = env.int('NEWS_FETCH_WORKERS', default=8)
+NEWS_FETCH_CONNECTIONS_PER_HOST = env.int('NEWS_FETCH_CONNECTIONS_PER_HOST', default=4)
+NEWS_ANALYSIS_WORKERS = env.int('NEWS_ANALYSIS_WORKERS', default=2)
+NEWS_MAX_PENDING = env.int('NEWS_MAX_PENDING', default=32)
+NEWS_WRITE_BATCH_SIZE = env.int('NEWS_WRITE_BATCH_SIZE', default=20)
+
+NEWS_VIEW_FLUSH_INTERVAL = env.int('NEWS_VIEW_FLUSH_INTERVAL', default=30)
+NEWS_VIEW_BUFFER_SIZE = env.int('NEWS_VIEW_BUFFER_SIZE', default=500)
+NEWS_VIEW_DEDUP_TIMEOUT = env.int('NEWS_VIEW_DEDUP_TIMEOUT', default=24 * 60 * 60)
+
+NEWS_SUMMARIZATION_ENGINE = env('NEWS_SUMMARIZATION_ENGINE', default='news.management.engines.GensimEngine')
+NEWS_BATCH_KEYWORDS = env.bool('NEWS_BATCH_KEYWORDS', default=False)
+
+NEWS_BODY_STREAM_THRESHOLD = env.int('NEWS_BODY_STREAM_THRESHOLD', default=256 * 1024)
+
+NEWS_FEED_CACHE_PAGES = env.int('NEWS_FEED_CACHE_PAGES', default=5)
+NEWS_FEED_CACHE_TIMEOUT = env.int('NEWS_FEED_CACHE_TIMEOUT', default=3 * 60 * 60)
+
+NEWS_PERSONAL_FEED_WINDOW = env.int('NEWS_PERSONAL_FEED_WINDOW', default=3 * 24 * 60 * 60)
+NEWS_PERSONAL_FEED_HALF_LIFE = env.int('NEWS_PERSONAL_FEED_HALF_LIFE', default=12 * 60 * 60)
+NEWS_PERSONAL_FEED_SIZE = env.int('NEWS_PERSONAL_FEED_SIZE', default=200)
+NEWS_PERSONAL_FEED_TIMEOUT = env.int('NEWS_PERSONAL_FEED_TIMEOUT', default=10 * 60)
+
+NEWS_EXTRACTION_CACHE = {
+    'BACKEND': env('NEWS_EXTRACTION_CACHE_BACKEND',
+                   default='news.management.extraction.DjangoExtractionCache'),
+    'LOCATION': env('NEWS_EXTRACTION_CACHE_LOCATION', default=None),
+    'TTL': env.int('NEWS_EXTRACTION_CACHE_TTL', default=6 * 60 * 60),
+    'MAX_ENTRIES': env.int('NEWS_EXTRACTION_CACHE_MAX_ENTRIES', default=1000),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
 
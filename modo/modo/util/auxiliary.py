@@ -1,17 +1,187 @@
-import random
+import os
+import threading
 import time
+import uuid
 
 START_TIME = 757512000
+START_TIME_MS = START_TIME * 1000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+# Identifiers made before millisecond timestamps were (seconds << 23) | 23 random bits,
+# all of them below this limit.
+LEGACY_ID_LIMIT = 1 << 54
+LEGACY_TIME_SHIFT = 23
+
+WORKER_KEY_PREFIX = 'modo:id-worker:'
+WORKER_LEASE_TIMEOUT = 10 * 60
+
+
+def lease_worker_id(token):
+    """Lease a worker id that no other process holds.
+
+    Worker ids are taken in turn from a counter in the cache, which must be shared by
+    every process making identifiers, and each is held by a key expiring after
+    WORKER_LEASE_TIMEOUT seconds unless it is renewed. Processes that read the same
+    count, on caches whose incr is not atomic, still take different ids, since the key
+    holding an id is only added once.
+
+    Args:
+        token: str, Value identifying the lease holder.
+
+    Returns:
+        worker: int, Leased worker id.
+    """
+    from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(cache, (DummyCache, LocMemCache)):
+        raise RuntimeError('Worker ids cannot be leased from a cache private to the process, '
+                           'set CACHE_URL to a shared cache or ID_WORKER to the worker id of the process')
+
+    counter = WORKER_KEY_PREFIX + 'next'
+    # Memcached cannot increment a negative number.
+    cache.add(counter, 0, timeout=None)
+    for _ in range(MAX_WORKER + 1):
+        try:
+            worker = (cache.incr(counter) - 1) & MAX_WORKER
+        except ValueError:
+            raise RuntimeError('The cache lost the worker id counter, worker ids need a shared cache')
+        if cache.add(WORKER_KEY_PREFIX + str(worker), token, WORKER_LEASE_TIMEOUT):
+            return worker
+
+    raise RuntimeError('Every one of the {} worker ids is leased'.format(MAX_WORKER + 1))
+
+
+class IdGenerator:
+    """Snowflake identifiers, a millisecond timestamp, a worker id and a sequence number.
+
+    Identifiers made by one worker are unique and increasing: the sequence numbers
+    identifiers made in the same millisecond, and once it is exhausted, or if the clock
+    goes back, the generator moves on to the next millisecond of its own.
+
+    Every process takes a worker id of its own, forked processes included: the one set
+    in ID_WORKER, for deployments that give each process its own, or else one leased
+    from the cache and renewed while identifiers are made. A worker id that cannot be
+    leased raises RuntimeError rather than risk duplicate identifiers.
+    """
+    def __init__(self, worker=None):
+        """
+        Args:
+            worker: int, Worker id of the process, read from ID_WORKER or leased by default.
+        """
+        self._lock = threading.Lock()
+        self._configured = worker
+        self._pid = None
+        self._worker = None
+        self._token = None
+        self._renew_at = 0
+        self._last = -1
+        self._sequence = 0
+
+    @property
+    def worker(self):
+        with self._lock:
+            self._check_worker()
+            return self._worker
+
+    def make_ids(self, n):
+        """Make identifiers.
+
+        Args:
+            n: int, Number of identifiers.
+
+        Returns:
+            ids: list, Increasing identifiers.
+        """
+        ids = []
+        with self._lock:
+            self._check_worker()
+
+            now = int(time.time() * 1000) - START_TIME_MS
+            if now > self._last:
+                self._last, self._sequence = now, 0
+
+            while len(ids) < n:
+                if self._sequence > MAX_SEQUENCE:
+                    self._last, self._sequence = self._last + 1, 0
+                count = min(n - len(ids), MAX_SEQUENCE + 1 - self._sequence)
+                prefix = (self._last << TIME_SHIFT) | (self._worker << SEQUENCE_BITS)
+                ids.extend(prefix | sequence for sequence in range(self._sequence, self._sequence + count))
+                self._sequence += count
+
+        return ids
+
+    def _check_worker(self):
+        if self._pid != os.getpid():
+            self._start(forked=self._pid is not None)
+        elif self._token is not None and time.monotonic() >= self._renew_at:
+            self._renew()
+
+    def _start(self, forked):
+        self._pid = os.getpid()
+        self._last = -1
+        self._token = None
+
+        worker = self._configured
+        if worker is None and os.environ.get('ID_WORKER'):
+            if forked:
+                raise RuntimeError('ID_WORKER is the worker id of the parent process, '
+                                   'forked processes need a worker id of their own')
+            worker = int(os.environ['ID_WORKER'])
+
+        if worker is None:
+            self._lease()
+        elif 0 <= worker <= MAX_WORKER:
+            self._worker = worker
+        else:
+            raise ValueError('Worker id must be between 0 and {}'.format(MAX_WORKER))
+
+    def _lease(self):
+        self._token = '{}:{}'.format(self._pid, uuid.uuid4().hex)
+        self._worker = lease_worker_id(self._token)
+        self._renew_at = time.monotonic() + WORKER_LEASE_TIMEOUT / 2
+
+    def _renew(self):
+        from django.core.cache import cache
+
+        key = WORKER_KEY_PREFIX + str(self._worker)
+        if cache.get(key) != self._token:
+            # The lease expired, the worker id may belong to another process by now.
+            self._lease()
+            return
+
+        cache.set(key, self._token, WORKER_LEASE_TIMEOUT)
+        self._renew_at = time.monotonic() + WORKER_LEASE_TIMEOUT / 2
+
+
+_generator = IdGenerator()
 
 
 def make_id():
-    t = int(time.time()) - START_TIME
-    u = random.SystemRandom().getrandbits(23)
-    id_ = (t << 23) | u
+    return _generator.make_ids(1)[0]
 
-    return id_
+
+def make_ids(n):
+    return _generator.make_ids(n)
+
+
+def first_id(timestamp):
+    # Smallest identifier made at or after a time, identifiers being ordered by time.
+    t = int(timestamp * 1000) - START_TIME_MS
+    return t << TIME_SHIFT
 
 
 def reverse_id(id_):
-    t = id_ >> 23
-    return t + START_TIME
+    if id_ < LEGACY_ID_LIMIT:
+        t = id_ >> LEGACY_TIME_SHIFT
+        return t + START_TIME
+
+    t = id_ >> TIME_SHIFT
+    return (t + START_TIME_MS) // 1000
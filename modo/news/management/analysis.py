@@ -0,0 +1,207 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from gensim.parsing.porter import PorterStemmer
+from gensim.parsing.preprocessing import DEFAULT_FILTERS, preprocess_string
+from gensim.summarization import textcleaner
+# Private helpers of gensim's keywords, as of the gensim version pinned in requirements.txt.
+from gensim.summarization.keywords import (_build_graph, _extract_tokens, _format_results,
+                                           _get_combined_keywords, _get_keywords_with_score,
+                                           _get_words_for_graph, _pagerank, _remove_unreachable_nodes,
+                                           _set_graph_edges)
+from gensim.utils import to_unicode, tokenize
+
+# Every gensim preprocessing filter but stemming, which is memoized per word instead.
+NORMALIZATION_FILTERS = DEFAULT_FILTERS[:-1]
+KEYWORD_POS_FILTER = ('NN', 'JJ')
+MAX_TERM_LENGTH = 50
+WORD_RUN = re.compile(r'[0-9A-Za-z]+')
+
+
+def count_words(text):
+    """Count the words of a text.
+
+    Args:
+        text: str, Text to count.
+
+    Returns:
+        count: int, Number of runs of letters and digits.
+    """
+    return len(WORD_RUN.findall(text))
+
+
+class TextAnalysis:
+    """Text of an article tokenized, split into sentences and stemmed once.
+
+    Keyword extraction, summarization and word counting all work from this one
+    representation. It reproduces what gensim's keywords and summarize compute on their
+    own, where the text would be tokenized twice for keywords, split and stemmed again
+    for every summary, and split once more for every word count. Seconds spent in each
+    phase are accumulated in `timings`.
+    """
+    def __init__(self, text, title=None):
+        """
+        Args:
+            text: str, Text to summarize.
+            title: str, Title of the text, prepended to it for keyword extraction only.
+        """
+        self.text = to_unicode(text)
+        self.keyword_text = self.text if title is None else '. '.join([to_unicode(title), self.text])
+        self.timings = {}
+
+        self._stemmer = PorterStemmer()
+        self._stems = {}
+        self._normalized = {}
+        self._nested = []
+        self._sentences = None
+        self._sentence_lengths = None
+        self._word_count = None
+        self._tokens = None
+        self._word_units = None
+
+    @contextmanager
+    def phase(self, name):
+        """Add the time spent in the block, minus time of nested phases, to `timings[name]`."""
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    @property
+    def sentences(self):
+        """Sentences of the text as SyntacticUnits, with their stemmed words in `token`."""
+        if self._sentences is None:
+            with self.phase('split'):
+                original = textcleaner.split_sentences(self.text)
+            with self.phase('normalize'):
+                filtered = [' '.join(self._stem_all(preprocess_string(sentence, NORMALIZATION_FILTERS)))
+                            for sentence in original]
+            self._sentences = textcleaner.merge_syntactic_units(original, filtered)
+
+        return self._sentences
+
+    @property
+    def tokens(self):
+        """Lowercased, deaccented words of the keyword text."""
+        if self._tokens is None:
+            with self.phase('tokenize'):
+                text = textcleaner.replace_with_separator(self.keyword_text, '',
+                                                          [textcleaner.AB_ACRONYM_LETTERS])
+                self._tokens = list(tokenize(text, to_lower=True, deacc=True))
+
+        return self._tokens
+
+    @property
+    def word_units(self):
+        """SyntacticUnit of every distinct word of the keyword text, with its stem in `token`."""
+        if self._word_units is None:
+            tokens = self.tokens
+            with self.phase('normalize'):
+                filtered = [self._normalize(word) for word in tokens]
+            with self.phase('tag'):
+                tags = textcleaner.tag(' '.join(tokens)) if textcleaner.HAS_PATTERN else None
+            units = textcleaner.merge_syntactic_units(tokens, filtered, tags)
+            self._word_units = {unit.text: unit for unit in units}
+
+        return self._word_units
+
+    def word_count(self, sentences=None):
+        """Count words of the text, or of some of its sentences.
+
+        Args:
+            sentences: list, Indices of sentences to count, the whole text by default.
+
+        Returns:
+            count: int, Number of words.
+        """
+        if self._sentence_lengths is None:
+            units = self.sentences
+            with self.phase('count'):
+                self._word_count = count_words(self.text)
+                self._sentence_lengths = [count_words(unit.text) for unit in units]
+
+        if sentences is None:
+            return self._word_count
+        return sum(self._sentence_lengths[index] for index in sentences)
+
+    def keywords(self, words=5, ratio=0.25, pos_filter=KEYWORD_POS_FILTER):
+        """Extract keywords like gensim's keywords(..., split=True, lemmatize=True).
+
+        Args:
+            words: int, Number of keywords.
+            ratio: float, Fraction of words kept when words is None.
+            pos_filter: tuple, Part of speech tags of candidate words, used when pattern is installed.
+
+        Returns:
+            keywords: list, Keywords of the text.
+        """
+        units = self.word_units
+        tokens = self.tokens
+
+        with self.phase('keywords'):
+            graph = _build_graph(_get_words_for_graph(units, pos_filter))
+            _set_graph_edges(graph, units, tokens)
+            _remove_unreachable_nodes(graph)
+            # Texts too short or made of stopwords leave no edges, which PageRank divides by.
+            if not graph.edges():
+                return []
+
+            nodes = graph.nodes()
+            extracted = _extract_tokens(nodes, _pagerank(graph), ratio,
+                                        words if words is None else min(words, len(nodes)))
+            lemmas_to_word = {unit.token: [word] for word, unit in units.items()}
+            keywords = _get_keywords_with_score(extracted, lemmas_to_word)
+            combined = _get_combined_keywords(keywords, self.keyword_text.split())
+
+            return _format_results(keywords, combined, True, False)
+
+    def terms(self, pos_filter=KEYWORD_POS_FILTER):
+        """Count the stems of candidate keywords in the keyword text.
+
+        Args:
+            pos_filter: tuple, Part of speech tags of candidate words, used when pattern is installed.
+
+        Returns:
+            terms: dict, Number of occurrences and most frequent word of each stem.
+        """
+        units = self.word_units
+        tokens = self.tokens
+
+        with self.phase('terms'):
+            candidates = set(_get_words_for_graph(units, pos_filter))
+            words = Counter(word for word in tokens
+                            if word in units and units[word].token in candidates and len(word) <= MAX_TERM_LENGTH)
+
+            terms = {}
+            for word, count in words.most_common():
+                stem = units[word].token
+                if stem in terms:
+                    terms[stem] = (terms[stem][0] + count, terms[stem][1])
+                else:
+                    terms[stem] = (count, word)
+
+            return terms
+
+    def _normalize(self, word):
+        normalized = self._normalized.get(word)
+        if normalized is None:
+            normalized = ''.join(self._stem_all(preprocess_string(word, NORMALIZATION_FILTERS)))
+            self._normalized[word] = normalized
+        return normalized
+
+    def _stem_all(self, words):
+        stems = []
+        for word in words:
+            stem = self._stems.get(word)
+            if stem is None:
+                stem = self._stemmer.stem(word)
+                self._stems[word] = stem
+            stems.append(stem)
+        return stems
@@ -0,0 +1,160 @@
+import re
+import time
+import timeit
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from news import serializers
+from news.models import Article
+from .bodies import decompress_text
+from .engines import GensimEngine, NumpyEngine
+
+
+def make_articles(count):
+    """Build unsaved articles and the matching .values() rows.
+
+    Args:
+        count: int, Number of articles.
+
+    Returns:
+        articles: list, Article instances.
+        rows: list, Dictionaries of column values, as returned by .values().
+    """
+    now = timezone.now()
+    articles = [Article(identifier=6000000000000000 + i,
+                        url='https://example.com/news/{}'.format(i),
+                        title='Headline number {}'.format(i),
+                        authors=None if i % 7 == 0 else 'Jane Doe, John Doe',
+                        description='Description of the story — №{}'.format(i),
+                        summary='Summary of the story. ' * 5,
+                        keywords=['economy', 'market', 'trade'],
+                        site_name='Example News',
+                        domain='example.com',
+                        images='https://example.com/images/{}.jpg'.format(i),
+                        publish_time=now - timedelta(minutes=i))
+                for i in range(count)]
+
+    fields = {field.attname for field in Article._meta.concrete_fields}
+    rows = [{name: value for name, value in vars(article).items() if name in fields} for article in articles]
+
+    return articles, rows
+
+
+def benchmark_serializers(sizes=(40, 400, 4000), repeat=5):
+    """Compare the model serializers with their fast path on headline and summary payloads.
+
+    Args:
+        sizes: tuple, Numbers of rows serialized.
+        repeat: int, Number of timed runs, the best is reported.
+
+    Returns:
+        results: list, Tuples of payload, size, model serializer seconds and fast path seconds.
+    """
+    renderer = JSONRenderer()
+    pairs = [
+        ('headline', serializers.ArticleHeadlineSerializer, serializers.fast_headline_serializer),
+        ('summary', serializers.ArticleSummarySerializer, serializers.fast_summary_serializer),
+    ]
+
+    results = []
+    for size in sizes:
+        articles, rows = make_articles(size)
+        for payload, serializer_class, fast_serializer in pairs:
+            expected = renderer.render(serializer_class(articles, many=True).data)
+            actual = renderer.render(fast_serializer.serialize(rows))
+            if expected != actual:
+                raise AssertionError('{} output differs at {} rows'.format(payload, size))
+
+            slow = min(timeit.repeat(lambda: serializer_class(articles, many=True).data,
+                                     number=1, repeat=repeat))
+            fast = min(timeit.repeat(lambda: fast_serializer.serialize(rows), number=1, repeat=repeat))
+            results.append((payload, size, slow, fast))
+
+    return results
+
+
+def compare_engines(texts, ratio=0.2, word_count=50):
+    """Compare the NumPy summarization engine with gensim on speed and agreement.
+
+    Agreement is measured as the ROUGE-1 F score of the NumPy summary against the gensim
+    summary, and as the Jaccard overlap of the sentences they select.
+
+    Args:
+        texts: iterable, Texts to summarize.
+        ratio: float, Ratio target.
+        word_count: int, Word count target.
+
+    Returns:
+        report: dict, Total seconds of each engine and mean agreement scores.
+    """
+    engines = {'gensim': GensimEngine(), 'numpy': NumpyEngine()}
+    seconds = {name: 0.0 for name in engines}
+    rouge, jaccard, compared = 0.0, 0.0, 0
+
+    for text in texts:
+        summaries = {}
+        try:
+            for name, engine in engines.items():
+                start = time.perf_counter()
+                prepared = engine.prepare(text)
+                summaries[name] = (prepared.select(ratio=ratio), prepared.select(word_count=word_count))
+                seconds[name] += time.perf_counter() - start
+        except ValueError:
+            # gensim refuses texts of a single sentence.
+            continue
+
+        for reference, candidate in zip(summaries['gensim'], summaries['numpy']):
+            rouge += _rouge_1(reference, candidate)
+            jaccard += _jaccard(set(reference.split('\n')), set(candidate.split('\n')))
+            compared += 1
+
+    return {
+        'gensim_seconds': round(seconds['gensim'], 3),
+        'numpy_seconds': round(seconds['numpy'], 3),
+        'rouge_1': round(rouge / compared, 3) if compared else None,
+        'sentence_jaccard': round(jaccard / compared, 3) if compared else None,
+        'summaries': compared,
+    }
+
+
+def _rouge_1(reference, candidate):
+    reference_words = re.findall(r'\w+', reference.lower())
+    candidate_words = re.findall(r'\w+', candidate.lower())
+    if not reference_words or not candidate_words:
+        return float(reference_words == candidate_words)
+
+    remaining = {}
+    for word in reference_words:
+        remaining[word] = remaining.get(word, 0) + 1
+    overlap = 0
+    for word in candidate_words:
+        if remaining.get(word):
+            remaining[word] -= 1
+            overlap += 1
+
+    precision = overlap / len(candidate_words)
+    recall = overlap / len(reference_words)
+    return 2 * precision * recall / (precision + recall) if overlap else 0.0
+
+
+def _jaccard(first, second):
+    union = first | second
+    return len(first & second) / len(union) if union else 1.0
+
+
+def main_engines(count=200):
+    # python manage.py shell -c "from news.management.benchmarks import main_engines; main_engines()"
+    texts = ('. '.join([description or '', decompress_text(content)]) for description, content in
+             Article.objects.exclude(body=None).values_list('description', 'body__content')[:count].iterator())
+    for key, value in compare_engines(texts).items():
+        print('{:<18}{}'.format(key, value))
+
+
+def main():
+    # python manage.py shell -c "from news.management.benchmarks import main; main()"
+    print('{:<10}{:>8}{:>14}{:>14}{:>10}'.format('payload', 'rows', 'serializer', 'fast path', 'speedup'))
+    for payload, size, slow, fast in benchmark_serializers():
+        print('{:<10}{:>8}{:>13.2f}ms{:>12.2f}ms{:>9.1f}x'.format(payload, size, slow * 1000, fast * 1000,
+                                                                  slow / fast))
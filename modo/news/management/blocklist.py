@@ -0,0 +1,59 @@
+import functools
+from urllib.parse import urlsplit
+
+
+class DomainBlocklist:
+    """Set of blocked domains, also blocking every subdomain of a blocked domain."""
+    def __init__(self, domains=()):
+        """
+        Args:
+            domains: iterable, Blocked domains, host names or URLs.
+        """
+        self.domains = {domain for domain in map(self.normalize, domains) if domain}
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a blocklist with one domain per line, ignoring blank lines and # comments."""
+        with open(path, 'r') as file:
+            return cls(line.split('#', 1)[0] for line in file)
+
+    @staticmethod
+    def normalize(domain):
+        domain = domain.strip().lower()
+        if '://' in domain:
+            domain = urlsplit(domain).hostname or ''
+        domain = domain.rstrip('.')
+        return domain[4:] if domain.startswith('www.') else domain
+
+    def blocks(self, domain):
+        """Whether a domain, host name or URL is blocked.
+
+        Args:
+            domain: str, Domain, host name or URL.
+
+        Returns:
+            blocked: bool, Whether the domain or one of its parent domains is blocked.
+        """
+        if not self.domains or not domain:
+            return False
+
+        labels = self.normalize(domain).split('.')
+        return any('.'.join(labels[i:]) in self.domains for i in range(len(labels)))
+
+    __contains__ = blocks
+
+    def __len__(self):
+        return len(self.domains)
+
+
+@functools.lru_cache(maxsize=None)
+def load_blocklist(path):
+    """Load a blocklist file once per process.
+
+    Args:
+        path: str, Path to the blocklist file.
+
+    Returns:
+        blocklist: DomainBlocklist, Loaded blocklist.
+    """
+    return DomainBlocklist.from_file(path)
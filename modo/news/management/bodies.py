@@ -0,0 +1,78 @@
+import codecs
+import hashlib
+import json
+import zlib
+
+COMPRESSION_LEVEL = 6
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def compress_text(text):
+    """Compress the text of an article.
+
+    Args:
+        text: str, Text of the article.
+
+    Returns:
+        content: bytes, Compressed UTF-8 text.
+    """
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(content):
+    """Decompress the text of an article.
+
+    Args:
+        content: bytes, Compressed UTF-8 text.
+
+    Returns:
+        text: str, Text of the article.
+    """
+    return zlib.decompress(content).decode('utf-8')
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def iter_decompressed(chunks):
+    """Decompress the text of an article piece by piece.
+
+    Args:
+        chunks: iterable, Consecutive slices of the compressed content.
+
+    Yields:
+        text: str, Consecutive pieces of the text.
+    """
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    for chunk in chunks:
+        text = decoder.decode(decompressor.decompress(chunk))
+        if text:
+            yield text
+
+    text = decoder.decode(decompressor.flush(), final=True)
+    if text:
+        yield text
+
+
+def iter_json_with_text(data, pieces, field='text'):
+    """Render a JSON object whose text field is streamed last.
+
+    Args:
+        data: bytes, Rendered JSON object without the text field.
+        pieces: iterable, Consecutive pieces of the text.
+        field: str, Name of the text field.
+
+    Yields:
+        content: bytes, Consecutive pieces of the JSON document.
+    """
+    head = data.rstrip()[:-1].rstrip()
+    separator = b'' if head.endswith(b'{') else b','
+    yield head + separator + json.dumps(field).encode('utf-8') + b':"'
+
+    for piece in pieces:
+        yield json.dumps(piece, ensure_ascii=False)[1:-1].encode('utf-8')
+
+    yield b'"}'
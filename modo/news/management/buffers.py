@@ -0,0 +1,112 @@
+import atexit
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """Write-behind buffer of article views.
+
+    Views are collected in memory with the time they happened, and written to viewed_by,
+    together with the views counter, in one statement per flush. A flush happens every
+    `flush_interval` seconds, as soon as `max_size` views are waiting, and when the
+    process exits. Written views are remembered per (article, user) in the Django cache,
+    so a repeated view costs a single cache operation and is never buffered again.
+    """
+    key_prefix = 'news:viewed:'
+
+    def __init__(self, flush_interval=None, max_size=None, dedup_timeout=None):
+        """
+        Args:
+            flush_interval: int, Seconds between flushes.
+            max_size: int, Number of buffered views that triggers a flush.
+            dedup_timeout: int, Seconds a view is remembered in the cache.
+        """
+        self.flush_interval = flush_interval or settings.NEWS_VIEW_FLUSH_INTERVAL
+        self.max_size = max_size or settings.NEWS_VIEW_BUFFER_SIZE
+        self.dedup_timeout = dedup_timeout or settings.NEWS_VIEW_DEDUP_TIMEOUT
+
+        self._views = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def record(self, article_id, user_id):
+        """Record that a user viewed an article.
+
+        Args:
+            article_id: bigint, Article identifier/pk.
+            user_id: bigint, User identifier/pk.
+
+        Returns:
+            recorded: bool, Whether the view is new.
+        """
+        if self.seen(article_id, user_id):
+            return False
+
+        with self._lock:
+            self._views.setdefault((article_id, user_id), timezone.now())
+            waiting = len(self._views)
+            if self._flusher is None:
+                self._start()
+
+        if waiting >= self.max_size:
+            self._wake.set()
+
+        return True
+
+    def seen(self, article_id, user_id):
+        """Whether a view of the article by the user is waiting or was written recently."""
+        return (article_id, user_id) in self._views or cache.get(self._key(article_id, user_id)) is not None
+
+    def flush(self):
+        """Write buffered views to the database.
+
+        Returns:
+            added: int, Number of views added.
+        """
+        with self._lock:
+            views, self._views = self._views, {}
+
+        if not views:
+            return 0
+
+        article_model = apps.get_model('news', 'Article')
+        try:
+            added = article_model.objects.add_relations(
+                'viewed_by', [(article_id, user_id, viewed) for (article_id, user_id), viewed in views.items()])
+        except DatabaseError as e:
+            logger.warning('{} while flushing {} views'.format(e, len(views)))
+            with self._lock:
+                for view, viewed in views.items():
+                    self._views.setdefault(view, viewed)
+            return 0
+
+        # Views are remembered once written, so a view lost with the buffer can be recorded again.
+        cache.set_many({self._key(*view): 1 for view in views}, self.dedup_timeout)
+        return added
+
+    def _key(self, article_id, user_id):
+        return '{}{}:{}'.format(self.key_prefix, article_id, user_id)
+
+    def _start(self):
+        self._flusher = threading.Thread(target=self._run, name='view-buffer', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            connection.close()
+
+
+view_buffer = ViewBuffer()
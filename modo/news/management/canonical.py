@@ -0,0 +1,44 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMETERS = {
+    'cmpid', 'fbclid', 'gclid', 'icid', 'mbid', 'ncid', 'ocid',
+    'ref', 'ref_src', 'rss', 'smid', 'soc_src', 'soc_trk', 'xtor',
+}
+TRACKING_PREFIXES = ('utm_', 'mc_', 'ns_', 'pk_', 'at_')
+
+
+def canonicalize_url(url):
+    """Reduce a URL to a canonical form for de-duplication.
+
+    The scheme and host are normalized, and the fragment and tracking parameters are
+    removed, so the same article reached through different links has the same key.
+
+    Args:
+        url: str, URL to canonicalize.
+
+    Returns:
+        canonical_url: str, Canonical form of the URL.
+    """
+    parts = urlsplit(url.strip())
+
+    scheme = parts.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = '{}:{}'.format(host, parts.port)
+
+    path = parts.path.rstrip('/') or '/'
+
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(key))
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def _is_tracking(parameter):
+    parameter = parameter.lower()
+    return parameter in TRACKING_PARAMETERS or parameter.startswith(TRACKING_PREFIXES)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from news.management.summary import result_cache_metrics
+
+
+class Command(BaseCommand):
+    help = 'Report the hits and misses of the /news/summarize result cache.'
+
+    def handle(self, *args, **options):
+        self.stdout.write('{hits} hits, {misses} misses, hit ratio {hit_ratio}'.format(**result_cache_metrics()))
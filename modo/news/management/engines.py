@@ -0,0 +1,200 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+from gensim.summarization.summarizer import _build_corpus, summarize_corpus
+
+from .analysis import TextAnalysis
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Get the summarization engine configured in settings.NEWS_SUMMARIZATION_ENGINE.
+
+    Returns:
+        engine: SummarizationEngine, Shared engine instance.
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = import_string(settings.NEWS_SUMMARIZATION_ENGINE)()
+
+    return _engine
+
+
+class SummarizationEngine:
+    """Interface of extractive summarization backends.
+
+    `rank` does the work that does not depend on the summary length, and the returned
+    ranking's `select` answers any number of ratio or word count targets from it.
+    """
+    def prepare(self, text):
+        """Prepare a text for summarization.
+
+        Args:
+            text: str, Text to summarize.
+
+        Returns:
+            ranking: SentenceRanking, Ranked sentences of the text.
+        """
+        return self.rank(TextAnalysis(text))
+
+    def rank(self, analysis):
+        """Rank the sentences of an analyzed text.
+
+        Args:
+            analysis: TextAnalysis, Analyzed text.
+
+        Returns:
+            ranking: SentenceRanking, Ranked sentences of the text.
+        """
+        raise NotImplementedError
+
+    def summarize(self, text, ratio=0.2, word_count=None):
+        return self.prepare(text).select(ratio=ratio, word_count=word_count)
+
+
+class GensimEngine(SummarizationEngine):
+    """TextRank summarization by gensim.
+
+    Sentences are ranked once by gensim's BM25 weighted TextRank, which gives the same
+    summaries as gensim's summarize for every target.
+    """
+    def rank(self, analysis):
+        units = analysis.sentences
+        if len(units) == 1:
+            raise ValueError('input must have more than one sentence')
+        if not units:
+            return SentenceRanking([], [])
+
+        corpus = _build_corpus(units)
+        # Duplicate sentences share a document, which stands for the last of them.
+        by_document = {tuple(document): index for index, document in enumerate(corpus)}
+        order = [by_document[tuple(document)] for document in summarize_corpus(corpus, ratio=1)]
+
+        return SentenceRanking([unit.text for unit in units], order)
+
+
+class NumpyEngine(SummarizationEngine):
+    """Vectorized TextRank over TF-IDF sentence vectors.
+
+    Sentence similarities are the cosine similarities of TF-IDF vectors, computed as one
+    matrix product, and sentences are ranked once by power iteration on that graph.
+    """
+    def __init__(self, damping=0.85, tolerance=1e-6, max_iterations=100):
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+    def rank(self, analysis):
+        units = analysis.sentences
+        scores = self.score([unit.token.split() for unit in units])
+        # Stable sort keeps earlier sentences first among equal scores.
+        order = sorted(range(len(units)), key=lambda index: -scores[index])
+
+        return SentenceRanking([unit.text for unit in units], order)
+
+    def score(self, tokens):
+        """Score tokenized sentences.
+
+        Args:
+            tokens: list, Lists of words of each sentence.
+
+        Returns:
+            scores: ndarray, TextRank score of each sentence.
+        """
+        count = len(tokens)
+        if count == 0:
+            return np.zeros(0)
+
+        vocabulary = {}
+        rows, columns = [], []
+        for row, words in enumerate(tokens):
+            for word in words:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(word, len(vocabulary)))
+
+        if not vocabulary:
+            return np.full(count, 1 / count)
+
+        frequencies = np.zeros((count, len(vocabulary)))
+        np.add.at(frequencies, (rows, columns), 1)
+
+        document_frequencies = np.count_nonzero(frequencies, axis=0)
+        weights = frequencies * (np.log(count / document_frequencies) + 1)
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        weights = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+
+        similarities = weights @ weights.T
+        np.fill_diagonal(similarities, 0)
+
+        # Sentences sharing no word with any other jump uniformly, like dangling pages.
+        totals = similarities.sum(axis=1, keepdims=True)
+        transitions = np.divide(similarities, totals, out=np.full_like(similarities, 1 / count),
+                                where=totals > 0)
+
+        scores = np.full(count, 1 / count)
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) / count + self.damping * (transitions.T @ scores)
+            converged = np.abs(updated - scores).sum() < self.tolerance
+            scores = updated
+            if converged:
+                break
+
+        return scores
+
+
+class SentenceRanking:
+    """Sentences of a text ranked once, answering summaries of any length."""
+    def __init__(self, sentences, order):
+        """
+        Args:
+            sentences: list, Sentences of the text.
+            order: list, Indices of sentences, the best ranked first.
+        """
+        self.sentences = sentences
+        self.order = order
+        self.lengths = [len(sentence.split()) for sentence in sentences]
+
+    def selected(self, ratio=None, word_count=None):
+        """Pick the best ranked sentences.
+
+        Args:
+            ratio: float, Fraction of sentences to keep, 0.2 by default.
+            word_count: int, Approximate number of words to keep, overrides ratio.
+
+        Returns:
+            indices: list, Indices of the selected sentences, in their original order.
+        """
+        if len(self.sentences) < 2:
+            return []
+
+        if word_count is not None:
+            chosen, length = [], 0
+            for index in self.order:
+                if abs(word_count - length - self.lengths[index]) > abs(word_count - length):
+                    break
+                chosen.append(index)
+                length += self.lengths[index]
+        else:
+            ratio = 0.2 if ratio is None else ratio
+            chosen = self.order[:int(len(self.sentences) * ratio)]
+
+        return sorted(chosen)
+
+    def select(self, ratio=None, word_count=None):
+        """Summarize with the best ranked sentences.
+
+        Args:
+            ratio: float, Fraction of sentences to keep, 0.2 by default.
+            word_count: int, Approximate number of words to keep, overrides ratio.
+
+        Returns:
+            summary: str, Selected sentences separated by new lines.
+        """
+        return '\n'.join(self.sentences[index] for index in self.selected(ratio, word_count))
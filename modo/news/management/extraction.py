@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError
+from django.utils.module_loading import import_string
+from goose3 import Goose
+from goose3.configuration import Configuration
+from requests.adapters import HTTPAdapter
+
+from .canonical import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {'User-Agent': Configuration().browser_user_agent}
+FETCH_TIMEOUT = 30
+# Stale extractions are kept for revalidation until they are this many TTLs old.
+STALE_TTLS = 4
+
+_cache = None
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def extract_info(url):
+    """Download a web page and extract the article in it.
+
+    Extractions are cached by canonical URL. A cached extraction is used as is while it
+    is fresh, and revalidated with its ETag or Last-Modified header once it is stale.
+
+    Args:
+        url: str, URL to the article.
+
+    Returns:
+        info: dict, Article information extracted by Goose.
+    """
+    cache = get_extraction_cache()
+    key = ExtractionCache.digest(url)
+    entry = cache.get(key) if cache is not None else None
+
+    if entry is not None and time.time() - entry['stored_at'] < cache.ttl:
+        return entry['info']
+
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    pool = get_extractor_pool()
+    response = pool.session.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+
+    if entry is not None and response.status_code == 304:
+        entry['stored_at'] = time.time()
+        cache.set(key, entry)
+        return entry['info']
+
+    response.raise_for_status()
+
+    with pool.extractor() as goose:
+        info = goose.extract(url=response.url, raw_html=response.text).infos
+
+    if cache is not None:
+        cache.set(key, {
+            'info': info,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+        })
+
+    return info
+
+
+def get_extraction_cache():
+    """Get the extraction cache configured in settings.NEWS_EXTRACTION_CACHE.
+
+    Returns:
+        cache: ExtractionCache, Configured cache, None if caching is disabled.
+    """
+    global _cache
+
+    config = settings.NEWS_EXTRACTION_CACHE
+    if not config['BACKEND']:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = import_string(config['BACKEND'])
+                _cache = backend(ttl=config['TTL'], location=config['LOCATION'],
+                                 max_entries=config['MAX_ENTRIES'])
+
+    return _cache
+
+
+def get_extractor_pool():
+    """Get the extractor pool shared by the current process.
+
+    Returns:
+        pool: ExtractorPool, Shared extractor pool.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ExtractorPool(size=settings.NEWS_FETCH_WORKERS,
+                                      connections_per_host=settings.NEWS_FETCH_CONNECTIONS_PER_HOST)
+
+    return _pool
+
+
+class ExtractorPool:
+    """Thread-safe pool of Goose extractors sharing one keep-alive HTTP session.
+
+    Connections are pooled per host, and at most `connections_per_host` are open to the
+    same host at a time; further requests to that host wait for a free connection.
+    """
+    def __init__(self, size, connections_per_host, hosts=50):
+        """
+        Args:
+            size: int, Maximum number of idle extractors kept.
+            connections_per_host: int, Maximum number of connections to a single host.
+            hosts: int, Number of hosts whose connection pools are kept.
+        """
+        adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=connections_per_host,
+                              pool_block=True)
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._extractors = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def extractor(self):
+        """Borrow an extractor from the pool, creating one if none is idle."""
+        try:
+            goose = self._extractors.get_nowait()
+        except queue.Empty:
+            goose = Goose({'browser_user_agent': HEADERS['User-Agent'],
+                           'http_timeout': FETCH_TIMEOUT})
+
+        try:
+            yield goose
+        finally:
+            try:
+                self._extractors.put_nowait(goose)
+            except queue.Full:
+                goose.close()
+
+
+class ExtractionCache:
+    """Base class for caches of extracted articles.
+
+    Entries are dictionaries holding the extracted info, the validators of the response
+    it came from and the time it was stored.
+    """
+    def __init__(self, ttl, location=None, max_entries=None):
+        """
+        Args:
+            ttl: int, Seconds an entry is used without revalidation.
+            location: str, Backend specific location of the cache.
+            max_entries: int, Maximum number of entries kept.
+        """
+        self.ttl = ttl
+        self.location = location
+        self.max_entries = max_entries
+
+    @staticmethod
+    def digest(url):
+        return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+
+class DjangoExtractionCache(ExtractionCache):
+    """Extraction cache stored in one of the Django caches.
+
+    `location` is the alias of the Django cache, `extraction` by default, which should
+    not be shared with other uses since it is culled. The cache is opened with
+    `max_entries` as its MAX_ENTRIES, so backends that count their entries, such as the
+    database and local memory caches, cull beyond it. Entries expire once they are
+    STALE_TTLS TTLs old.
+    """
+    key_prefix = 'news:extraction:'
+
+    def __init__(self, ttl, location=None, max_entries=None):
+        super().__init__(ttl, location or 'extraction', max_entries)
+        self.timeout = ttl * STALE_TTLS
+
+        try:
+            params = dict(settings.CACHES[self.location])
+        except KeyError:
+            raise InvalidCacheBackendError('The cache {} is not configured'.format(self.location))
+        backend = import_string(params.pop('BACKEND'))
+        location = params.pop('LOCATION', '')
+        if max_entries:
+            params['OPTIONS'] = dict(params.get('OPTIONS') or {}, MAX_ENTRIES=max_entries)
+        self.cache = backend(location, params)
+
+    def get(self, key):
+        return self.cache.get(self.key_prefix + key)
+
+    def set(self, key, entry):
+        # Stale entries are kept so they can be revalidated instead of downloaded again.
+        self.cache.set(self.key_prefix + key, entry, timeout=self.timeout)
+
+
+class DiskExtractionCache(ExtractionCache):
+    """Extraction cache stored as JSON files in a local directory.
+
+    File modification times record the last use of an entry, and the least recently
+    used entries are evicted once there are more than `max_entries`.
+    """
+    def __init__(self, ttl, location=None, max_entries=None):
+        super().__init__(ttl, location, max_entries or 1000)
+        os.makedirs(self.location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, '{}.json'.format(key))
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return entry
+
+    def set(self, key, entry):
+        path = self._path(key)
+        temp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(entry, file, default=str)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning('{} while caching extraction'.format(e))
+            return
+
+        self._evict()
+
+    def _evict(self):
+        try:
+            entries = [entry for entry in os.scandir(self.location) if entry.name.endswith('.json')]
+        except OSError:
+            return
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
@@ -0,0 +1,107 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+class FeedCache:
+    """Cache of rendered JSON for the first pages of the headline feed.
+
+    Pages are keyed by their absolute URL and a generation number. Bumping the
+    generation when new articles are committed invalidates every cached page at once.
+    Only one request renders a missing page; concurrent requests for it wait briefly
+    for the result instead of all hitting the database.
+    """
+    key_prefix = 'news:feed:'
+    generation_key = key_prefix + 'generation'
+    cursor_param = 'cursor'
+
+    def __init__(self, pages=None, timeout=None, lock_timeout=10, wait=2.0):
+        """
+        Args:
+            pages: int, Number of pages from the top of the feed that are cached.
+            timeout: int, Seconds a cached page is kept.
+            lock_timeout: int, Seconds a render lock is held at most.
+            wait: float, Seconds to wait for a page rendered by another request.
+        """
+        self.pages = pages or settings.NEWS_FEED_CACHE_PAGES
+        self.timeout = timeout or settings.NEWS_FEED_CACHE_TIMEOUT
+        self.lock_timeout = lock_timeout
+        self.wait = wait
+
+    def cacheable(self, request):
+        """Whether the request is for the plain feed in JSON."""
+        return set(request.query_params) <= {self.cursor_param} \
+            and request.accepted_renderer.format == 'json'
+
+    def get_or_render(self, request, render):
+        """Serve a feed page from the cache, rendering and caching it on a miss.
+
+        Args:
+            request: Request, Feed request.
+            render: function, Produces the paginated Response of the page.
+
+        Returns:
+            response: HttpResponse or Response, Rendered page.
+        """
+        generation = cache.get(self.generation_key, 0)
+        url = request.build_absolute_uri()
+        page_key = self._key(generation, 'page', url)
+        depth_key = self._key(generation, 'depth', url)
+
+        cached = cache.get_many([page_key, depth_key])
+        if page_key in cached:
+            return self._response(cached[page_key])
+
+        depth = 1 if self.cursor_param not in request.query_params else cached.get(depth_key)
+        if depth is None or depth > self.pages:
+            return render()
+
+        lock_key = page_key + ':lock'
+        if not cache.add(lock_key, 1, self.lock_timeout):
+            content = self._wait_for(page_key)
+            return self._response(content) if content is not None else render()
+
+        try:
+            response = render()
+            if response.status_code != 200:
+                return response
+
+            content = JSONRenderer().render(response.data)
+            cache.set(page_key, content, self.timeout)
+            if response.data.get('next'):
+                cache.set(self._key(generation, 'depth', response.data['next']), depth + 1, self.timeout)
+        finally:
+            cache.delete(lock_key)
+
+        return self._response(content)
+
+    def invalidate(self):
+        """Invalidate every cached feed page."""
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            cache.add(self.generation_key, 1, timeout=None)
+
+    def _wait_for(self, page_key):
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            content = cache.get(page_key)
+            if content is not None:
+                return content
+        return None
+
+    def _key(self, generation, kind, url):
+        return '{}{}:{}:{}'.format(self.key_prefix, generation, kind,
+                                   hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def _response(content):
+        return HttpResponse(content, content_type='application/json')
+
+
+feed_cache = FeedCache()
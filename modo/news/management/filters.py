@@ -0,0 +1,25 @@
+import re
+
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+
+class FullTextSearchFilter(SearchFilter):
+    """Ranked full text search on articles with the search query parameter."""
+    def filter_queryset(self, request, queryset, view):
+        if not self.is_searching(request):
+            return queryset
+
+        return queryset.model.objects.search(request.query_params[self.search_param], queryset)
+
+    @classmethod
+    def is_searching(cls, request):
+        return re.search(r'\w', request.query_params.get(cls.search_param, '')) is not None
+
+
+class FeedFilter(BaseFilterBackend):
+    """Per-domain and per-language feeds, on exact values of the domain and language parameters."""
+    fields = ('domain', 'language')
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = {field: request.query_params[field] for field in self.fields if field in request.query_params}
+        return queryset.filter(**lookups) if lookups else queryset
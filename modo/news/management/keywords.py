@@ -0,0 +1,69 @@
+import numpy as np
+from django.apps import apps
+
+
+class BatchKeywordExtractor:
+    """TF-IDF keyword extraction over a batch of articles.
+
+    Terms of every article in the batch are weighed in one matrix against the document
+    frequencies of the stored corpus, so words common to most news, which TextRank
+    happily picks from a single article, give way to words that set the article apart.
+    The batch counts as part of the corpus, which keeps the weights meaningful while
+    the corpus table is still empty.
+    """
+    def __init__(self, words=5):
+        """
+        Args:
+            words: int, Number of keywords per article.
+        """
+        self.words = words
+
+    def extract(self, documents):
+        """Extract keywords of a batch of articles.
+
+        Args:
+            documents: list, Terms of each article, as returned by TextAnalysis.terms.
+
+        Returns:
+            keywords: list, Keywords of each article.
+        """
+        terms = {term for document in documents for term in document}
+        corpus_term_model = apps.get_model('news', 'CorpusTerm')
+        corpus_size, corpus_frequencies = corpus_term_model.objects.document_frequencies(terms)
+
+        return self.rank(documents, corpus_size, corpus_frequencies)
+
+    def rank(self, documents, corpus_size, corpus_frequencies):
+        """Pick the terms of each article with the highest TF-IDF weights.
+
+        Args:
+            documents: list, Terms of each article, as returned by TextAnalysis.terms.
+            corpus_size: int, Number of documents in the corpus.
+            corpus_frequencies: dict, Number of documents of the corpus containing each term.
+
+        Returns:
+            keywords: list, Keywords of each article.
+        """
+        vocabulary = {}
+        rows, columns, counts = [], [], []
+        for row, terms in enumerate(documents):
+            for term, (count, _) in terms.items():
+                rows.append(row)
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+
+        if not vocabulary:
+            return [[] for _ in documents]
+
+        frequencies = np.zeros((len(documents), len(vocabulary)))
+        frequencies[rows, columns] = counts
+
+        terms = sorted(vocabulary, key=vocabulary.get)
+        document_frequencies = np.array([corpus_frequencies.get(term, 0) for term in terms]) \
+            + np.count_nonzero(frequencies, axis=0)
+        corpus_size += len(documents)
+        weights = np.log1p(frequencies) * (np.log((corpus_size + 1) / (document_frequencies + 1)) + 1)
+
+        best = np.argsort(-weights, axis=1, kind='mergesort')[:, :self.words]
+        return [[documents[row][terms[column]][1] for column in columns if weights[row, column] > 0]
+                for row, columns in enumerate(best)]
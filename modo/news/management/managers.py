@@ -1,18 +1,101 @@
 import logging
+import math
+import re
+from collections import Counter
+from datetime import timedelta
 
 from dateutil import parser
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
-from django.db.models import Manager
+from django.db import IntegrityError, connections, transaction
+from django.db.models import (Count, F, FloatField, Func, IntegerField, Manager, Max, OuterRef, Q,
+                              Subquery, TextField, Value)
+from django.db.models.functions import Cast, Coalesce
 from django.template.defaultfilters import slugify
 from django.utils import timezone
-from gensim.summarization import keywords, summarize
-from goose3 import Goose
 
-from person.models import Human
+from modo.util import auxiliary
+from .blocklist import DomainBlocklist
+from .bodies import STREAM_CHUNK_SIZE, compress_text, decompress_text, iter_decompressed, text_digest
+from .canonical import canonicalize_url
+from .extraction import extract_info
+from .summary import analyze_article
+from .workers import get_nlp_pool
 
 logger = logging.getLogger(__name__)
 
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+INVALID = 'invalid'
+
+SEARCH_CONFIG = 'english'
+
+POLL_GRACE = timedelta(minutes=5)
+
+# Row of the corpus term table counting documents rather than a term.
+CORPUS_DOCUMENTS = '#documents'
+
+RELATION_COUNTERS = {
+    'saved_by': 'saves',
+    'viewed_by': 'views',
+    'shared_by': 'shares',
+}
+
+
+def search_vector():
+    """Weighted search vector of an article, titles and keywords weighing the most."""
+    keywords = Func(F('keywords'), Value(' '), function='array_to_string', output_field=TextField())
+    return SearchVector('title', weight='A', config=SEARCH_CONFIG) \
+        + SearchVector(keywords, weight='A', config=SEARCH_CONFIG) \
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG) \
+        + SearchVector('summary', weight='C', config=SEARCH_CONFIG)
+
+
+def article_source(article):
+    """NewsAPI source id of a polled article, None if it has none."""
+    return (article.get('source') or {}).get('id')
+
+
+def article_publish_time(article):
+    """Publish time of a polled article, None if it is missing or malformed."""
+    try:
+        return parser.parse(article['publishedAt'])
+    except (KeyError, ValueError, OverflowError, TypeError):
+        return None
+
+
+def keyword_weights(keywords):
+    """Weigh the keywords of an article by their rank.
+
+    Keywords are weighted by the inverse of their rank, normalized so the article's
+    keyword vector has unit length.
+
+    Args:
+        keywords: list, Keywords of an article, the most important first.
+
+    Returns:
+        weights: dict, Weight of each lowercased keyword.
+    """
+    ranked = []
+    for keyword in keywords or []:
+        keyword = keyword.lower()
+        if keyword not in ranked:
+            ranked.append(keyword)
+
+    norm = math.sqrt(sum(1 / (rank + 1) ** 2 for rank in range(len(ranked))))
+    return {keyword: 1 / (rank + 1) / norm for rank, keyword in enumerate(ranked)}
+
+
+class PrefixSearchQuery(SearchQuery):
+    """Search query matching all words of the value, each as a prefix."""
+    def as_sql(self, compiler, connection):
+        terms = re.findall(r'\w+', self.value)
+        config_sql, config_params = compiler.compile(self.config)
+        template = 'to_tsquery({}::regconfig, %s)'.format(config_sql)
+        return template, config_params + [' & '.join('{}:*'.format(term) for term in terms)]
+
 
 class ArticleManager(Manager):
     use_in_migration = True
@@ -29,28 +112,92 @@ class ArticleManager(Manager):
             authors: str, Authors' names.
             publish_time: str, Time of publishing.
             title_image: str, URL to title image.
-            undesirables: str, List of undesirable sources.
+            undesirables: DomainBlocklist, Blocked domains, a list of domains is also accepted.
 
         Returns:
             None.
         """
-        if undesirables is None:
-            undesirables = []
+        if not isinstance(undesirables, DomainBlocklist):
+            undesirables = DomainBlocklist(undesirables or [])
 
-        if self.filter(url=url).count():
+        if undesirables.blocks(url) or self.known_urls([url]):
             return
 
-        article = self.model(authors=authors)
+        article_info = extract_info(url)
+
+        if undesirables.blocks(article_info['domain']):
+            return
 
-        goose = Goose()
+        article_text = self._extract_section(article_info, 'cleaned_text', None)
+        article_keywords, summary, _ = get_nlp_pool().run(analyze_article, title, description, article_text)
 
-        article_info = goose.extract(url=url)
-        article_info = article_info.infos
+        article = self.build_article(article_info, article_keywords, summary,
+                                     url=url, authors=authors, publish_time=publish_time,
+                                     title_image=title_image, description=description,
+                                     title=title)
+        self.create_articles([article])
 
-        if article_info['domain'] in undesirables:
-            return
+    def known_urls(self, urls):
+        """Find which of the given URLs are already stored, in a single query.
+
+        Args:
+            urls: iterable, URLs to look up.
+
+        Returns:
+            known: set, Canonical forms of the URLs already stored.
+        """
+        urls = set(urls)
+        canonical_urls = {canonicalize_url(url) for url in urls}
+
+        stored = self.filter(Q(url__in=urls) | Q(canonical_url__in=canonical_urls)) \
+            .values_list('url', 'canonical_url')
+
+        return {canonical_url or canonicalize_url(url) for url, canonical_url in stored}
+
+    def filter_new(self, headlines):
+        """Drop headlines whose articles are already stored or repeated.
+
+        Args:
+            headlines: iterable, Dictionaries of keyword arguments to create_article.
+
+        Returns:
+            new_headlines: list, Headlines pointing to articles not stored yet.
+        """
+        headlines = list(headlines)
+        known = self.known_urls(headline['url'] for headline in headlines)
+
+        new_headlines = []
+        for headline in headlines:
+            canonical_url = canonicalize_url(headline['url'])
+            if canonical_url in known:
+                continue
+            known.add(canonical_url)
+            new_headlines.append(headline)
+
+        return new_headlines
+
+    def build_article(self, article_info, article_keywords, summary, url, authors,
+                      publish_time, title_image, description, title):
+        """Assemble an unsaved article from extracted and analyzed information.
+
+        Args:
+            article_info: dict, Article information extracted from the source page.
+            article_keywords: list, Keywords of the article.
+            summary: str, Summary of the article.
+            url: str, URL to the article, used when the page declares no canonical URL.
+            authors: str, Authors' names.
+            publish_time: str, Time of publishing.
+            title_image: str, URL to title image.
+            description: str, Description of the article.
+            title: str, Title of the article.
+
+        Returns:
+            article: Article, Article instance not yet saved to the database.
+        """
+        article = self.model(authors=authors)
 
-        article.url = article_info['opengraph']['url']
+        article.url = article_info['opengraph'].get('url') or url
+        article.canonical_url = canonicalize_url(article.url)
 
         article.description = description
         article.title = title
@@ -58,16 +205,8 @@ class ArticleManager(Manager):
         article.images = title_image
         article.domain = article_info['domain']
 
-        article_text = self._extract_section(article_info, 'cleaned_text', None)
-        article.text = article_text
-        article.keywords = keywords('. '.join([title, description, article_text]), words=5, split=True,
-                                    ratio=0.25, lemmatize=True)
-
-        summary = summarize('. '.join([description, article_text]), ratio=0.2)
-        if summary == '':
-            summary = summarize('. '.join([description, article_text]), word_count=50)
-        if summary == '':
-            summary = article_text
+        article.text = self._extract_section(article_info, 'cleaned_text', None)
+        article.keywords = article_keywords
         article.summary = summary
 
         try:
@@ -97,14 +236,127 @@ class ArticleManager(Manager):
         except (ValueError, OverflowError, TypeError):
             article.publish_time = current_time
 
+        return article
+
+    def create_articles(self, articles, chunk_size=None):
+        """Validate and insert built articles in bulk.
+
+        Articles are validated in memory, given new identifiers, and each chunk is written
+        with a single bulk insert. Articles whose url is already stored are skipped. If a chunk hits a
+        conflict written concurrently, that chunk alone is retried row by row, and an article
+        whose identifier collided with a stored one is written once more under a new identifier.
+
+        Args:
+            articles: iterable, Unsaved Article instances.
+            chunk_size: int, Number of articles per insert statement.
+
+        Returns:
+            outcomes: list, One of CREATED, DUPLICATE or INVALID for every input article, in order.
+        """
+        articles = list(articles)
+        chunk_size = chunk_size or len(articles) or 1
+        outcomes = [None] * len(articles)
+
+        candidates = []
+        for index, article in enumerate(articles):
+            try:
+                article.full_clean(validate_unique=False)
+            except ValidationError:
+                outcomes[index] = INVALID
+                continue
+            candidates.append((index, article))
+
+        stored = set(self.filter(url__in={article.url for _, article in candidates})
+                     .values_list('url', flat=True))
+
+        fresh = []
+        for index, article in candidates:
+            if article.url in stored:
+                outcomes[index] = DUPLICATE
+                continue
+            stored.add(article.url)
+            fresh.append((index, article))
+
+        # Identifiers are made in one batch as the articles are written.
+        for (_, article), identifier in zip(fresh, auxiliary.make_ids(len(fresh))):
+            article.identifier = identifier
+
+        for start in range(0, len(fresh), chunk_size):
+            chunk = fresh[start:start + chunk_size]
+            try:
+                with transaction.atomic():
+                    self.bulk_create([article for _, article in chunk])
+                    self.index_articles([article for _, article in chunk])
+                    apps.get_model('news', 'ArticleBody').objects.store([article for _, article in chunk])
+            except IntegrityError:
+                for index, article in chunk:
+                    outcomes[index] = self._create_one(article)
+            else:
+                for index, _ in chunk:
+                    outcomes[index] = CREATED
+
+        return outcomes
+
+    def _create_one(self, article, retry=True):
         try:
-            article.full_clean()
-            article.save()
-        except ValidationError:
-            pass
+            with transaction.atomic():
+                article.save(force_insert=True)
+                self.index_articles([article])
         except IntegrityError as ie:
-            logger.warning('{} while fetching {} from {}'.format(ie, article.title, article.site_name))
-            pass
+            if self.filter(url=article.url).exists():
+                logger.warning('{} while fetching {} from {}'.format(ie, article.title, article.site_name))
+                return DUPLICATE
+
+            # The URL is not stored, so the identifier collided with another article's.
+            logger.error('{} while writing {}'.format(ie, article.url))
+            if not retry:
+                return INVALID
+            article.identifier = auxiliary.make_id()
+            return self._create_one(article, retry=False)
+        return CREATED
+
+    def index_articles(self, articles):
+        """Add newly saved articles to the keyword and full text search indexes.
+
+        Args:
+            articles: list, Saved Article instances.
+
+        Returns:
+            None.
+        """
+        apps.get_model('news', 'ArticleKeyword').objects.index_articles(articles)
+        self.update_search_vectors(articles)
+
+    def update_search_vectors(self, articles):
+        """Compute the full text search vectors of saved articles from their stored fields.
+
+        Args:
+            articles: list, Saved Article instances.
+
+        Returns:
+            None.
+        """
+        self.filter(identifier__in=[article.identifier for article in articles]) \
+            .update(search_vector=search_vector())
+
+    def search(self, terms, queryset=None):
+        """Full text search over title, keywords, description and summary.
+
+        Every term is matched as a prefix, and results are annotated with their rank.
+
+        Args:
+            terms: str, Search terms.
+            queryset: QuerySet, Articles to search, all articles by default.
+
+        Returns:
+            queryset: QuerySet, Matching articles annotated with rank.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+
+        query = PrefixSearchQuery(terms, config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query) \
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
 
     @staticmethod
     def _extract_section(info, section, absent):
@@ -135,9 +387,7 @@ class ArticleManager(Manager):
         Returns:
             None
         """
-        user = Human.objects.get(identifer=user_id)
-        article = self.get(identifier=article_id)
-        article.saved_by.add(user)
+        self.add_relation('saved_by', article_id, user_id)
 
     def remove_saved_article(self, user_id, article_id):
         """Remove a saved article for a particular user.
@@ -149,6 +399,424 @@ class ArticleManager(Manager):
         Returns:
             None.
         """
-        user = Human.objects.get(identifier=user_id)
-        article = self.get(identifier=article_id)
-        article.saved_by.remove(user)
+        self.remove_relation('saved_by', article_id, user_id)
+
+    def add_relation(self, relation, article_id, user_id):
+        """Add a user to one of the saved_by, viewed_by or shared_by sets of an article.
+
+        The relation and the article's counter are updated in a single statement, and
+        adding a user already in the set changes nothing, keeping the time it was first added.
+
+        Args:
+            relation: str, Name of the many to many field.
+            article_id: bigint, Article identifier/pk.
+            user_id: bigint, User identifier/pk.
+
+        Returns:
+            added: bool, Whether the user was not in the set before.
+        """
+        return self._change_relation(relation, article_id, user_id, """
+            WITH changed AS (
+                INSERT INTO {through} ({article_column}, {user_column}, {created_column})
+                VALUES (%s, %s, clock_timestamp())
+                ON CONFLICT DO NOTHING RETURNING 1
+            )
+            UPDATE {article} SET {counter} = {counter} + (SELECT count(*) FROM changed)
+            WHERE {pk} = %s RETURNING (SELECT count(*) FROM changed)
+        """)
+
+    def remove_relation(self, relation, article_id, user_id):
+        """Remove a user from one of the saved_by, viewed_by or shared_by sets of an article.
+
+        Args:
+            relation: str, Name of the many to many field.
+            article_id: bigint, Article identifier/pk.
+            user_id: bigint, User identifier/pk.
+
+        Returns:
+            removed: bool, Whether the user was in the set before.
+        """
+        return self._change_relation(relation, article_id, user_id, """
+            WITH changed AS (
+                DELETE FROM {through} WHERE {article_column} = %s AND {user_column} = %s
+                RETURNING 1
+            )
+            UPDATE {article} SET {counter} = {counter} - (SELECT count(*) FROM changed)
+            WHERE {pk} = %s RETURNING (SELECT count(*) FROM changed)
+        """)
+
+    def add_relations(self, relation, events):
+        """Add many (article, user) pairs to one of the relation sets in a single statement.
+
+        Pairs already in the set, or pointing to deleted articles or users, are ignored,
+        and the article counters grow by the number of pairs actually added.
+
+        Args:
+            relation: str, Name of the many to many field.
+            events: iterable, Tuples of article identifier, user identifier and the time
+                the user was related to the article.
+
+        Returns:
+            added: int, Number of pairs added.
+        """
+        events = list(events)
+        if not events:
+            return 0
+
+        field = self.model._meta.get_field(relation)
+        quote = connections[self.db].ops.quote_name
+        statement = """
+            WITH events (article_id, user_id, created) AS (VALUES {values}),
+            changed AS (
+                INSERT INTO {through} ({article_column}, {user_column}, {created_column})
+                SELECT events.article_id, events.user_id, events.created FROM events
+                JOIN {article} ON {article}.{pk} = events.article_id
+                JOIN {user} ON {user}.{user_pk} = events.user_id
+                ON CONFLICT DO NOTHING RETURNING {article_column}
+            ),
+            counts AS (
+                SELECT {article_column} AS article_id, count(*) AS added FROM changed
+                GROUP BY {article_column}
+            )
+            UPDATE {article} SET {counter} = {counter} + counts.added FROM counts
+            WHERE {article}.{pk} = counts.article_id RETURNING counts.added
+        """.format(
+            values=', '.join(['(%s::bigint, %s::bigint, %s::timestamptz)'] * len(events)),
+            through=quote(field.remote_field.through._meta.db_table),
+            article_column=quote(field.m2m_column_name()),
+            user_column=quote(field.m2m_reverse_name()),
+            created_column=quote(field.remote_field.through._meta.get_field('created').column),
+            article=quote(self.model._meta.db_table),
+            pk=quote(self.model._meta.pk.column),
+            user=quote(field.related_model._meta.db_table),
+            user_pk=quote(field.related_model._meta.pk.column),
+            counter=quote(RELATION_COUNTERS[relation]),
+        )
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(statement, [value for event in events for value in event])
+            return sum(row[0] for row in cursor.fetchall())
+
+    def _change_relation(self, relation, article_id, user_id, statement):
+        field = self.model._meta.get_field(relation)
+        quote = connections[self.db].ops.quote_name
+
+        statement = statement.format(
+            through=quote(field.remote_field.through._meta.db_table),
+            article_column=quote(field.m2m_column_name()),
+            user_column=quote(field.m2m_reverse_name()),
+            created_column=quote(field.remote_field.through._meta.get_field('created').column),
+            article=quote(self.model._meta.db_table),
+            counter=quote(RELATION_COUNTERS[relation]),
+            pk=quote(self.model._meta.pk.column),
+        )
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(statement, [article_id, user_id, article_id])
+            row = cursor.fetchone()
+
+        return row is not None and row[0] > 0
+
+    def recount_relations(self):
+        """Recompute the saves, views and shares counters from their relations.
+
+        Returns:
+            None.
+        """
+        for relation, counter in RELATION_COUNTERS.items():
+            field = self.model._meta.get_field(relation)
+            through = field.remote_field.through
+            counts = through.objects \
+                .filter(**{field.m2m_field_name(): OuterRef('pk')}) \
+                .order_by() \
+                .values(field.m2m_field_name()) \
+                .annotate(count=Count('*')) \
+                .values('count')
+            self.update(**{counter: Coalesce(Subquery(counts, output_field=IntegerField()), 0)})
+
+
+class ArticleKeywordManager(Manager):
+    use_in_migration = True
+
+    def index_articles(self, articles):
+        """Add articles to the keyword index.
+
+        Args:
+            articles: list, Saved Article instances.
+
+        Returns:
+            None.
+        """
+        entries = [self.model(keyword=keyword, article=article,
+                              publish_time=article.publish_time, weight=weight)
+                   for article in articles
+                   for keyword, weight in keyword_weights(article.keywords).items()]
+        self.bulk_create(entries)
+
+    def reindex_article(self, article):
+        """Replace the index entries of an article whose keywords changed.
+
+        Args:
+            article: Article, Saved Article instance.
+
+        Returns:
+            None.
+        """
+        with transaction.atomic():
+            self.filter(article=article).delete()
+            self.index_articles([article])
+
+    def related(self, article_id, keywords, publish_time, limit=10, window=timedelta(days=30)):
+        """Find articles sharing keywords with an article.
+
+        Only articles published within `window` of the article are considered, so the
+        lookup stays a bounded range scan of the (keyword, publish_time) index.
+
+        Args:
+            article_id: bigint, Identifier of the article to find related articles for.
+            keywords: list, Keywords of the article.
+            publish_time: datetime, Publish time of the article.
+            limit: int, Maximum number of related articles.
+            window: timedelta, Maximum distance in publish time.
+
+        Returns:
+            identifiers: list, Identifiers of related articles, most shared keywords first,
+                then most recent.
+        """
+        if not keywords:
+            return []
+
+        publish_time = publish_time or timezone.now()
+        ranked = self.filter(keyword__in=[keyword.lower() for keyword in keywords],
+                             publish_time__range=(publish_time - window, publish_time + window)) \
+            .exclude(article_id=article_id) \
+            .values('article_id') \
+            .annotate(overlap=Count('article_id'), latest=Max('publish_time')) \
+            .order_by('-overlap', '-latest')[:limit]
+
+        return [entry['article_id'] for entry in ranked]
+
+
+class NewsSourceManager(Manager):
+    use_in_migration = True
+
+    def due(self, sources, now=None):
+        """Select the sources due for polling.
+
+        Args:
+            sources: list, NewsAPI source ids.
+            now: datetime, Current time.
+
+        Returns:
+            due: list, Source ids never polled or whose next poll time has passed.
+        """
+        now = now or timezone.now()
+        # Scheduled runs start a little later than the previous one plus the interval.
+        not_due = set(self.filter(source__in=sources, next_poll__gt=now + POLL_GRACE)
+                      .values_list('source', flat=True))
+        return [source for source in sources if source not in not_due]
+
+    def new_articles(self, articles):
+        """Keep only articles newer than the high-water mark of their source.
+
+        Args:
+            articles: list, Articles returned by NewsAPI.
+
+        Returns:
+            new_articles: list, Articles published after the high-water mark of their source,
+                or whose source, mark or publish time is unknown.
+        """
+        marks = dict(self.filter(source__in={article_source(article) for article in articles})
+                     .values_list('source', 'high_water_mark'))
+
+        new_articles = []
+        for article in articles:
+            mark = marks.get(article_source(article))
+            published = article_publish_time(article)
+            if mark is None or published is None or published > mark:
+                new_articles.append(article)
+
+        return new_articles
+
+    def record_poll(self, sources, articles, failed_sources=(), now=None):
+        """Update the high-water marks and poll intervals of sources once their new articles are ingested.
+
+        Sources that published since the last poll are polled twice as often next time,
+        down to NEWS_POLL_MIN_INTERVAL, and quiet sources half as often, up to
+        NEWS_POLL_MAX_INTERVAL. Sources some of whose articles could not be ingested keep
+        their high-water mark and interval, and are polled again on the next run.
+
+        Args:
+            sources: list, NewsAPI source ids that were polled.
+            articles: list, New articles returned by NewsAPI for these sources.
+            failed_sources: iterable, Source ids of articles that could not be ingested.
+            now: datetime, Current time.
+
+        Returns:
+            None.
+        """
+        now = now or timezone.now()
+        failed_sources = set(failed_sources)
+        states = {state.source: state for state in self.filter(source__in=sources)}
+        for source in sources:
+            if source not in states:
+                states[source] = self.model(source=source, poll_interval=settings.NEWS_POLL_MIN_INTERVAL)
+
+        newest = {}
+        for article in articles:
+            source = article_source(article)
+            published = article_publish_time(article)
+            if source in states and published is not None:
+                newest[source] = max(published, newest.get(source, published))
+
+        with transaction.atomic():
+            for state in states.values():
+                if state.source in failed_sources:
+                    state.next_poll = now + timedelta(seconds=settings.NEWS_POLL_MIN_INTERVAL)
+                elif state.source in newest:
+                    state.high_water_mark = max(newest[state.source], state.high_water_mark or newest[state.source])
+                    state.poll_interval = max(settings.NEWS_POLL_MIN_INTERVAL, state.poll_interval // 2)
+                    state.next_poll = now + timedelta(seconds=state.poll_interval)
+                else:
+                    state.poll_interval = min(settings.NEWS_POLL_MAX_INTERVAL, state.poll_interval * 2)
+                    state.next_poll = now + timedelta(seconds=state.poll_interval)
+                state.last_polled = now
+                state.save()
+
+
+class CorpusTermManager(Manager):
+    """Document frequencies of keyword terms over stored articles."""
+    def document_frequencies(self, terms):
+        """Get the number of documents in the corpus and of documents containing each term.
+
+        Args:
+            terms: iterable, Terms to look up.
+
+        Returns:
+            documents: int, Number of documents in the corpus.
+            frequencies: dict, Number of documents containing each known term.
+        """
+        frequencies = dict(self.filter(term__in=list(terms) + [CORPUS_DOCUMENTS])
+                           .values_list('term', 'documents'))
+        return frequencies.pop(CORPUS_DOCUMENTS, 0), frequencies
+
+    def add_documents(self, documents):
+        """Count the terms of new documents in one statement.
+
+        Args:
+            documents: iterable, Terms of each document.
+
+        Returns:
+            None
+        """
+        counts = Counter()
+        for terms in documents:
+            counts.update(set(terms))
+            counts[CORPUS_DOCUMENTS] += 1
+
+        if not counts:
+            return
+
+        quote = connections[self.db].ops.quote_name
+        statement = """
+            INSERT INTO {table} ({term}, {documents}) VALUES {values}
+            ON CONFLICT ({term}) DO UPDATE SET {documents} = {table}.{documents} + EXCLUDED.{documents}
+        """.format(
+            table=quote(self.model._meta.db_table),
+            term=quote(self.model._meta.get_field('term').column),
+            documents=quote(self.model._meta.get_field('documents').column),
+            values=', '.join(['(%s, %s)'] * len(counts)),
+        )
+
+        # Sorted terms make concurrent writers lock rows in the same order.
+        rows = sorted(counts.items())
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(statement, [value for row in rows for value in row])
+
+
+class ArticleBodyManager(Manager):
+    """Compressed article texts, kept out of the article rows."""
+    def store(self, articles):
+        """Write the texts of articles in one statement, replacing stored ones.
+
+        Args:
+            articles: iterable, Saved Article instances.
+
+        Returns:
+            None
+        """
+        articles = list(articles)
+        with_text = [article for article in articles if article.text is not None]
+        without_text = [article.pk for article in articles if article.text is None]
+
+        if without_text:
+            self.filter(article_id__in=without_text).delete()
+
+        if with_text:
+            quote = connections[self.db].ops.quote_name
+            statement = """
+                INSERT INTO {table} ({article}, {content}, {length}, {digest}) VALUES {values}
+                ON CONFLICT ({article}) DO UPDATE SET {content} = EXCLUDED.{content},
+                    {length} = EXCLUDED.{length}, {digest} = EXCLUDED.{digest}
+            """.format(
+                table=quote(self.model._meta.db_table),
+                article=quote(self.model._meta.get_field('article').column),
+                content=quote(self.model._meta.get_field('content').column),
+                length=quote(self.model._meta.get_field('length').column),
+                digest=quote(self.model._meta.get_field('digest').column),
+                values=', '.join(['(%s, %s, %s, %s)'] * len(with_text)),
+            )
+            parameters = []
+            for article in with_text:
+                parameters += [article.pk, compress_text(article.text), len(article.text),
+                               text_digest(article.text)]
+
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(statement, parameters)
+
+        for article in articles:
+            article._text_changed = False
+
+    def text_of(self, article_id):
+        """Get the text of an article.
+
+        Args:
+            article_id: bigint, Article identifier/pk.
+
+        Returns:
+            text: str, Text of the article, None if it has none.
+        """
+        content = self.filter(article_id=article_id).values_list('content', flat=True).first()
+        return None if content is None else decompress_text(content)
+
+    def stream(self, article_id, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream the text of an article without loading it whole.
+
+        The compressed content is read from the database one slice at a time.
+
+        Args:
+            article_id: bigint, Article identifier/pk.
+            chunk_size: int, Bytes of compressed content read per query.
+
+        Returns:
+            pieces: iterator, Consecutive pieces of the text.
+        """
+        quote = connections[self.db].ops.quote_name
+        statement = 'SELECT substring({content} FROM %s FOR %s) FROM {table} WHERE {article} = %s'.format(
+            table=quote(self.model._meta.db_table),
+            article=quote(self.model._meta.get_field('article').column),
+            content=quote(self.model._meta.get_field('content').column),
+        )
+
+        def chunks():
+            offset = 1
+            while True:
+                with connections[self.db].cursor() as cursor:
+                    cursor.execute(statement, [offset, chunk_size, article_id])
+                    row = cursor.fetchone()
+                if row is None or not row[0]:
+                    return
+                yield bytes(row[0])
+                offset += chunk_size
+
+        return iter_decompressed(chunks())
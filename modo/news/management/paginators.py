@@ -1,6 +1,20 @@
-from rest_framework.pagination import CursorPagination
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+from .filters import FullTextSearchFilter
 
 
 class ArticlePaginator(CursorPagination):
     ordering = '-publish_time'
     page_size = 40
+
+    def get_ordering(self, request, queryset, view):
+        # Search results are paged by relevance.
+        if FullTextSearchFilter.is_searching(request):
+            return ('-rank',)
+        return super().get_ordering(request, queryset, view)
+
+
+class PersonalFeedPaginator(LimitOffsetPagination):
+    # Pages through a cached list of ranked identifiers.
+    default_limit = 40
+    max_limit = 100
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import math
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from modo.util import auxiliary
+from news.models import Article, ArticleKeyword
+from .blocklist import DomainBlocklist
+from .feed import feed_cache
+
+# Match score of an article from one of the user's sources, the score of a perfect keyword match.
+SOURCE_WEIGHT = 1.0
+# Articles made this many seconds before a ranking was built are scored again when it is refreshed,
+# for those committed after it was built.
+REFRESH_OVERLAP = 5 * 60
+
+
+class PersonalFeed:
+    """Recent articles ranked by how well they match a user's interests.
+
+    An article matches by the weights of the user's interest keywords in its unit length
+    keyword vector, plus SOURCE_WEIGHT when it comes from one of the user's sources, and
+    its score halves every `half_life` seconds of age. Rankings are ordered by the log of
+    the score, log(match) + publish time * ln 2 / half_life, which does not change as
+    time passes, so a cached ranking stays valid and new articles are merged into it.
+
+    Rankings are cached per user and interests for `timeout` seconds with the feed cache
+    generation. While the generation is unchanged no article was added and the ranking
+    is served without a query; once it changed only articles made since the ranking was
+    built are scored.
+    """
+    key_prefix = 'news:personal:'
+
+    def __init__(self, window=None, half_life=None, size=None, timeout=None):
+        """
+        Args:
+            window: int, Maximum age in seconds of ranked articles.
+            half_life: int, Seconds of age that halve the score of an article.
+            size: int, Maximum number of ranked articles.
+            timeout: int, Seconds a ranking is cached.
+        """
+        self.window = window or settings.NEWS_PERSONAL_FEED_WINDOW
+        self.half_life = half_life or settings.NEWS_PERSONAL_FEED_HALF_LIFE
+        self.size = size or settings.NEWS_PERSONAL_FEED_SIZE
+        self.timeout = timeout or settings.NEWS_PERSONAL_FEED_TIMEOUT
+
+    def ranking(self, user_id, interests):
+        """Rank recent articles for a user.
+
+        Args:
+            user_id: bigint, Identifier of the user.
+            interests: dict, Interest keywords and sources of the user.
+
+        Returns:
+            identifiers: list, Identifiers of matching articles, the best first.
+        """
+        keywords, sources = self.normalize(interests)
+        if not keywords and not sources:
+            return []
+
+        key = self._key(user_id, keywords, sources)
+        generation = cache.get(feed_cache.generation_key, 0)
+        now = time.time()
+        since = now - self.window
+
+        entry = cache.get(key)
+        if entry is None:
+            ranked = self._score(keywords, sources, since)
+        elif entry['generation'] != generation:
+            known = {identifier for _, identifier, _ in entry['ranked']}
+            scored = self._score(keywords, sources, since, made_after=entry['built'] - REFRESH_OVERLAP)
+            ranked = entry['ranked'] + [item for item in scored if item[1] not in known]
+        else:
+            return [identifier for _, identifier, published in entry['ranked'] if published >= since]
+
+        ranked = sorted(ranked, reverse=True)[:self.size]
+        cache.set(key, {'generation': generation, 'built': now, 'ranked': ranked}, self.timeout)
+
+        return [identifier for _, identifier, published in ranked if published >= since]
+
+    def rank_key(self, match, published):
+        """Time invariant ranking key of an article.
+
+        Args:
+            match: float, Match score of the article.
+            published: float, Publish timestamp of the article.
+
+        Returns:
+            key: float, Log of the decayed score, up to a constant shared by every article.
+        """
+        return math.log(match) + published * math.log(2) / self.half_life
+
+    @staticmethod
+    def normalize(interests):
+        """Lowercased interest keywords and normalized source domains, sorted."""
+        interests = interests or {}
+        keywords = {keyword.strip().lower() for keyword in interests.get('keywords') or []}
+        sources = {DomainBlocklist.normalize(source) for source in interests.get('sources') or []}
+        return sorted(keyword for keyword in keywords if keyword), sorted(source for source in sources if source)
+
+    def _score(self, keywords, sources, since, made_after=None):
+        since = datetime.fromtimestamp(since, timezone.utc)
+        matches = {}
+
+        if keywords:
+            entries = ArticleKeyword.objects.filter(keyword__in=keywords, publish_time__gte=since)
+            if made_after is not None:
+                entries = entries.filter(article_id__gte=auxiliary.first_id(made_after))
+            for entry in entries.values('article_id') \
+                    .annotate(match=Sum('weight'), published=Max('publish_time')):
+                matches[entry['article_id']] = [entry['match'], entry['published']]
+
+        if sources:
+            # Domains may be stored with their www. prefix.
+            domains = sources + ['www.' + source for source in sources]
+            articles = Article.objects.filter(domain__in=domains, publish_time__gte=since)
+            if made_after is not None:
+                articles = articles.filter(identifier__gte=auxiliary.first_id(made_after))
+            for identifier, published in articles.values_list('identifier', 'publish_time'):
+                matches.setdefault(identifier, [0.0, published])[0] += SOURCE_WEIGHT
+
+        return [(self.rank_key(match, published.timestamp()), identifier, published.timestamp())
+                for identifier, (match, published) in matches.items() if match > 0]
+
+    def _key(self, user_id, keywords, sources):
+        # Changed interests are ranked again rather than served from the old ranking.
+        interests = json.dumps([keywords, sources]).encode('utf-8')
+        return '{}{}:{}'.format(self.key_prefix, user_id, hashlib.sha1(interests).hexdigest())
+
+
+personal_feed = PersonalFeed()
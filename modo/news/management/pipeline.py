@@ -0,0 +1,193 @@
+import logging
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from .blocklist import DomainBlocklist
+from .canonical import canonicalize_url
+from .extraction import extract_info
+from .feed import feed_cache
+from .keywords import BatchKeywordExtractor
+from .managers import CREATED
+from .summary import analyze_article, analyze_article_terms
+from .workers import get_nlp_pool
+
+logger = logging.getLogger(__name__)
+
+FETCH = 'fetch'
+ANALYSIS = 'analysis'
+
+
+class IngestionPipeline:
+    """Staged ingestion of headlines into articles.
+
+    Pages are downloaded by a pool of fetcher threads, keywords and summaries are computed
+    by the shared pool of NLP workers, and finished articles are written to the database in batches from
+    the calling thread. At most `max_pending` headlines are in flight at any time, so a
+    slow stage holds back the intake of new headlines instead of piling up work.
+
+    With batch keywords, the analysis stage only counts keyword terms, and keywords of
+    each write batch are extracted together by TF-IDF against the corpus term table.
+    """
+    def __init__(self, manager, fetch_workers=None, analysis_pool=None,
+                 max_pending=None, batch_size=None, batch_keywords=None):
+        """
+        Args:
+            manager: ArticleManager, Manager used to build and write articles.
+            fetch_workers: int, Number of concurrent page downloads.
+            analysis_pool: NLPWorkerPool, Workers computing keywords and summaries.
+            max_pending: int, Maximum number of headlines in flight.
+            batch_size: int, Number of articles written per bulk insert.
+            batch_keywords: bool, Whether keywords are extracted per batch rather than per article.
+        """
+        self.manager = manager
+        self.fetch_workers = fetch_workers or settings.NEWS_FETCH_WORKERS
+        self.analysis_pool = analysis_pool or get_nlp_pool()
+        self.max_pending = max_pending or settings.NEWS_MAX_PENDING
+        self.batch_size = batch_size or settings.NEWS_WRITE_BATCH_SIZE
+        self.batch_keywords = settings.NEWS_BATCH_KEYWORDS if batch_keywords is None else batch_keywords
+        self.keyword_extractor = BatchKeywordExtractor()
+
+        if self.max_pending < self.fetch_workers:
+            raise ValueError('max_pending cannot be smaller than the number of fetch workers.')
+
+        self._stages = {}
+
+    def run(self, headlines, undesirables=None):
+        """Ingest headlines.
+
+        Args:
+            headlines: iterable, Dictionaries of keyword arguments to
+                ArticleManager.create_article, without undesirables.
+            undesirables: DomainBlocklist, Blocked domains, a list of domains is also accepted.
+
+        Returns:
+            stats: Counter, Number of articles saved, skipped and failed, and seconds spent
+                in each phase of the analysis.
+        """
+        if not isinstance(undesirables, DomainBlocklist):
+            undesirables = DomainBlocklist(undesirables or [])
+
+        stats = Counter()
+        batch = []
+        pending = set()
+
+        # Drop blocked domains and resolve the rest against stored articles before downloading anything.
+        candidates = list(headlines)
+        allowed = [headline for headline in candidates if not undesirables.blocks(headline['url'])]
+        new_headlines = self.manager.filter_new(allowed)
+        stats['skipped'] += len(candidates) - len(new_headlines)
+        headlines = iter(new_headlines)
+        seen = {canonicalize_url(headline['url']) for headline in new_headlines}
+
+        analyzers = self.analysis_pool
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers:
+            while True:
+                for headline in islice(headlines, self.max_pending - len(pending)):
+                    self._submit(pending, fetchers, FETCH, headline, extract_info, headline['url'])
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                fetched = []
+                for future in done:
+                    stage, headline, article_info = self._stages.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning('{} during {} of {}'.format(repr(e), stage, headline['url']))
+                        stats['failed'] += 1
+                        continue
+
+                    if stage == FETCH:
+                        if undesirables.blocks(result['domain']):
+                            stats['skipped'] += 1
+                            continue
+                        fetched.append((headline, result))
+                    else:
+                        keywords_or_terms, summary, timings = result
+                        for phase, seconds in timings.items():
+                            stats['{}_seconds'.format(phase)] += seconds
+                        batch.append((headline, article_info, keywords_or_terms, summary))
+
+                for headline, article_info in self._drop_resolved_known(fetched, seen, stats):
+                    text = self.manager._extract_section(article_info, 'cleaned_text', None)
+                    self._submit(pending, analyzers, ANALYSIS, headline,
+                                 analyze_article_terms if self.batch_keywords else analyze_article,
+                                 headline['title'], headline['description'], text,
+                                 article_info=article_info)
+
+                if len(batch) >= self.batch_size:
+                    self._write(batch, stats)
+                    batch = []
+
+        if batch:
+            self._write(batch, stats)
+
+        return stats
+
+    def _drop_resolved_known(self, fetched, seen, stats):
+        """Drop fetched pages whose opengraph URL points to a known article.
+
+        Headlines often link through redirects or tracking URLs, so the page's own
+        canonical URL is checked once more before the expensive analysis.
+        """
+        resolved = []
+        for headline, article_info in fetched:
+            url = article_info.get('opengraph', {}).get('url')
+            canonical_url = canonicalize_url(url) if url else None
+            if canonical_url == canonicalize_url(headline['url']):
+                canonical_url = None
+            resolved.append(canonical_url)
+
+        redirected = {canonical_url for canonical_url in resolved if canonical_url}
+        known = self.manager.known_urls(redirected) if redirected else set()
+
+        for (headline, article_info), canonical_url in zip(fetched, resolved):
+            if canonical_url:
+                if canonical_url in known or canonical_url in seen:
+                    stats['skipped'] += 1
+                    continue
+                seen.add(canonical_url)
+            yield headline, article_info
+
+    def _submit(self, pending, executor, stage, headline, fn, *args, article_info=None):
+        future = executor.submit(fn, *args)
+        self._stages[future] = (stage, headline, article_info)
+        pending.add(future)
+
+    def _write(self, batch, stats):
+        if self.batch_keywords:
+            terms = [entry[2] for entry in batch]
+            all_keywords = self.keyword_extractor.extract(terms)
+        else:
+            terms = [None] * len(batch)
+            all_keywords = [entry[2] for entry in batch]
+
+        articles = []
+        article_terms = []
+        for (headline, article_info, _, summary), article_keywords, keyword_terms in \
+                zip(batch, all_keywords, terms):
+            try:
+                article = self.manager.build_article(article_info, article_keywords, summary, **headline)
+            except KeyError as e:
+                logger.warning('Missing {} in {}'.format(e, headline['url']))
+                stats['failed'] += 1
+                continue
+            articles.append(article)
+            article_terms.append(keyword_terms)
+
+        outcomes = self.manager.create_articles(articles)
+        if CREATED in outcomes:
+            transaction.on_commit(feed_cache.invalidate)
+        if self.batch_keywords:
+            corpus_term_model = apps.get_model('news', 'CorpusTerm')
+            corpus_term_model.objects.add_documents(
+                keyword_terms for keyword_terms, outcome in zip(article_terms, outcomes) if outcome == CREATED)
+        stats['saved'] += outcomes.count(CREATED)
+        stats['skipped'] += len(outcomes) - outcomes.count(CREATED)
@@ -0,0 +1,122 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+
+logger = logging.getLogger(__name__)
+
+TOP_HEADLINES_URL = 'https://newsapi.org/v2/top-headlines'
+SOURCES_PER_REQUEST = 10
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing out calls to at most `rate` per second."""
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SourcePoller:
+    """Concurrent poller of NewsAPI top headlines.
+
+    Sources are requested in chunks of SOURCES_PER_REQUEST, by a pool of threads sharing
+    a rate limit. Timeouts, connection errors, rate limiting and server errors are
+    retried with exponentially growing, fully jittered delays.
+    """
+    def __init__(self, api_key, workers=None, rate=None, timeout=None, retries=None, backoff=1.0,
+                 max_backoff=30.0):
+        """
+        Args:
+            api_key: str, NewsAPI key.
+            workers: int, Number of concurrent requests.
+            rate: float, Maximum number of requests per second.
+            timeout: float, Seconds before a request times out.
+            retries: int, Number of retries of a failed request.
+            backoff: float, Base delay in seconds before the first retry.
+            max_backoff: float, Maximum delay in seconds before a retry.
+        """
+        self.api_key = api_key
+        self.workers = workers or settings.NEWS_POLL_WORKERS
+        self.timeout = timeout or settings.NEWS_POLL_TIMEOUT
+        self.retries = settings.NEWS_POLL_RETRIES if retries is None else retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.limiter = RateLimiter(rate or settings.NEWS_POLL_RATE)
+        self.session = requests.Session()
+        self.session.headers.update({'X-Api-Key': api_key})
+
+    def poll(self, sources, page_size=30):
+        """Get top headlines of every source.
+
+        Args:
+            sources: list, NewsAPI source ids.
+            page_size: int, Number of headlines per request.
+
+        Returns:
+            articles: list, Articles as returned by NewsAPI.
+            failed: list, Sources whose request failed after every retry.
+        """
+        chunks = [sources[i:i + SOURCES_PER_REQUEST] for i in range(0, len(sources), SOURCES_PER_REQUEST)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda chunk: self.poll_chunk(chunk, page_size), chunks)
+
+        articles = []
+        failed = []
+        for chunk, result in zip(chunks, results):
+            if result is None:
+                failed += chunk
+            else:
+                articles += result
+
+        return articles, failed
+
+    def poll_chunk(self, sources, page_size=30):
+        """Get top headlines of a chunk of sources, retrying failed requests.
+
+        Args:
+            sources: list, NewsAPI source ids.
+            page_size: int, Number of headlines to request.
+
+        Returns:
+            articles: list, Articles as returned by NewsAPI, None if every attempt failed.
+        """
+        params = {'sources': ','.join(sources), 'pageSize': page_size}
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(TOP_HEADLINES_URL, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()['articles']
+                error = 'HTTP {}'.format(response.status_code)
+            except (Timeout, ConnectionError) as e:
+                error = repr(e)
+            except (HTTPError, ValueError, KeyError) as e:
+                logger.warning('{} while polling {}'.format(e, params['sources']))
+                return None
+
+            if attempt < self.retries:
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+        logger.warning('{} while polling {}, gave up after {} attempts'.format(
+            error, params['sources'], self.retries + 1))
+        return None
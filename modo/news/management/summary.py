@@ -1,13 +1,223 @@
-import re
-import string
+import hashlib
+import logging
 
-from goose3 import Goose
-from gensim.summarization import keywords, summarize
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from gensim.summarization.textcleaner import split_sentences
+
+from .analysis import TextAnalysis, count_words
+from .bodies import text_digest
+from .canonical import canonicalize_url
+from .engines import get_engine
+from .extraction import extract_info
+from .workers import get_nlp_pool
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_PREFIX = 'news:summary:'
+RESULT_CACHE_TIMEOUT = 24 * 60 * 60
+# Ratio of the summaries stored with ingested articles.
+ARTICLE_SUMMARY_RATIO = 0.2
+
+
+def analyze_article(title, description, text):
+    """Extract keywords and summary of an ingested article.
+
+    Kept at module level so it can be sent to a worker process.
+
+    Args:
+        title: str, Title of the article.
+        description: str, Description of the article.
+        text: str, Cleaned text of the article.
+
+    Returns:
+        article_keywords: list, Keywords of the article.
+        summary: str, Summary of the article.
+        timings: dict, Seconds spent in each phase of the analysis.
+    """
+    analysis = TextAnalysis('. '.join([description, text]), title=title)
+    article_keywords = analysis.keywords(words=5, ratio=0.25)
+    summary = _summarize_article(analysis, text)
+
+    return article_keywords, summary, analysis.timings
+
+
+def analyze_article_terms(title, description, text):
+    """Count keyword terms and summarize an ingested article, for batch keyword extraction.
+
+    Args:
+        title: str, Title of the article.
+        description: str, Description of the article.
+        text: str, Cleaned text of the article.
+
+    Returns:
+        terms: dict, Number of occurrences and most frequent word of each keyword stem.
+        summary: str, Summary of the article.
+        timings: dict, Seconds spent in each phase of the analysis.
+    """
+    analysis = TextAnalysis('. '.join([description, text]), title=title)
+    terms = analysis.terms()
+    summary = _summarize_article(analysis, text)
+
+    return terms, summary, analysis.timings
+
+
+def summarize_article(title, description, text, num_keywords, result_ratio, min_wordcount,
+                      max_wordcount, extract_keywords=True):
+    """Summarize an article and extract its keywords on demand.
+
+    Args:
+        title: str, Title of the article.
+        description: str, Description of the article.
+        text: str, Cleaned text of the article.
+        num_keywords: int, Number of keywords.
+        result_ratio: float, Ratio of the summary to the text.
+        min_wordcount: int, Minimum number of words of the summary.
+        max_wordcount: int, Maximum number of words of the summary.
+        extract_keywords: bool, Whether keywords are extracted.
+
+    Returns:
+        summarization: dict, Summary, and lengths of the text and summary.
+        article_keywords: list, Keywords of the article, None unless extracted.
+        timings: dict, Seconds spent in each phase of the analysis.
+    """
+    analysis = TextAnalysis('. '.join([description, text]), title=title)
+    summarization = _summarize(analysis, result_ratio, min_wordcount, max_wordcount)
+    article_keywords = analysis.keywords(words=num_keywords, ratio=0.25) if extract_keywords else None
+
+    return summarization, article_keywords, analysis.timings
+
+
+def extract_article_keywords(title, description, text, num_keywords):
+    """Extract keywords of an article on demand, when its summary is already known.
+
+    Args:
+        title: str, Title of the article.
+        description: str, Description of the article.
+        text: str, Cleaned text of the article.
+        num_keywords: int, Number of keywords.
+
+    Returns:
+        article_keywords: list, Keywords of the article.
+        timings: dict, Seconds spent in each phase of the analysis.
+    """
+    analysis = TextAnalysis('. '.join([description, text]), title=title)
+    article_keywords = analysis.keywords(words=num_keywords, ratio=0.25)
+
+    return article_keywords, analysis.timings
+
+
+def _summarize_article(analysis, text):
+    with analysis.phase('summary'):
+        ranking = get_engine().rank(analysis)
+        summary = ranking.select(ratio=ARTICLE_SUMMARY_RATIO)
+        if summary == '':
+            summary = ranking.select(word_count=50)
+
+    return summary or text
+
+
+def _summarize(analysis, result_ratio=0.2, min_wordcount=50, max_wordcount=150):
+    original_length = analysis.word_count()
+
+    shrunk_wordcount = int(original_length * result_ratio)
+
+    with analysis.phase('summary'):
+        ranking = get_engine().rank(analysis)
+        if shrunk_wordcount < min_wordcount:
+            selected = ranking.selected(word_count=min_wordcount)
+        elif shrunk_wordcount > max_wordcount:
+            selected = ranking.selected(word_count=max_wordcount)
+        else:
+            selected = ranking.selected(ratio=result_ratio)
+
+    if selected:
+        summary = '\n'.join(ranking.sentences[index] for index in selected)
+        shrunk_length = analysis.word_count(selected)
+    else:
+        summary = analysis.text
+        shrunk_length = original_length
+    shrinkage = round((original_length - shrunk_length) / original_length, 2)
+
+    return {
+        'summary': summary,
+        'original_length': original_length,
+        'summary_length': shrunk_length,
+        'shrinkage': shrinkage
+    }
+
+
+def stored_summarization(summary, text, result_ratio, min_wordcount, max_wordcount):
+    """Summarization of a text from the summary stored with its article, if it is the one requested.
+
+    The stored summary keeps ARTICLE_SUMMARY_RATIO of the sentences, which is what
+    `_summarize` selects when asked for that ratio and the shrunk word count falls
+    between the minimum and the maximum. It is only the requested summary if it was made
+    from the same description and text, which the caller checks, and by the engine
+    configured now, which is assumed since articles do not record the engine that
+    summarized them.
+
+    Args:
+        summary: str, Summary stored with the article.
+        text: str, Text the summary is requested for.
+        result_ratio: float, Ratio of the summary to the text.
+        min_wordcount: int, Minimum number of words of the summary.
+        max_wordcount: int, Maximum number of words of the summary.
+
+    Returns:
+        summarization: dict, Summary, and lengths of the text and summary, None unless it matches.
+    """
+    if not summary or result_ratio != ARTICLE_SUMMARY_RATIO:
+        return None
+
+    original_length = count_words(text)
+    if not min_wordcount <= int(original_length * result_ratio) <= max_wordcount:
+        return None
+    # Texts with too few sentences for the ratio were summarized by word count instead.
+    if int(len(split_sentences(text)) * result_ratio) == 0:
+        return None
+
+    shrunk_length = count_words(summary)
+    return {
+        'summary': summary,
+        'original_length': original_length,
+        'summary_length': shrunk_length,
+        'shrinkage': round((original_length - shrunk_length) / original_length, 2)
+    }
+
+
+def result_cache_metrics():
+    """Get hit and miss counts of the summarization result cache, reported by the summary_cache command.
+
+    Returns:
+        metrics: dict, Number of hits and misses, and the hit ratio.
+    """
+    counts = cache.get_many([RESULT_CACHE_PREFIX + 'hits', RESULT_CACHE_PREFIX + 'misses'])
+    hits = counts.get(RESULT_CACHE_PREFIX + 'hits', 0)
+    misses = counts.get(RESULT_CACHE_PREFIX + 'misses', 0)
+
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 2) if hits + misses else 0.0,
+    }
+
+
+def _count(metric):
+    key = RESULT_CACHE_PREFIX + metric
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
 
 
 class Summarizer:
     def __init__(self):
         self._raw_info = None
+        self._url = None
+        self._timings = {}
 
         self.num_keywords = 5
         self.default_ratio = 0.2
@@ -45,9 +255,8 @@ class Summarizer:
         Returns:
             None
         """
-        goose = Goose()
-        article = goose.extract(url)
-        self._raw_info = article.infos
+        self._url = url
+        self._raw_info = extract_info(url)
 
     def _parse(self, num_keywords, result_ratio, min_wordcount, max_wordcount):
         result = dict()
@@ -67,18 +276,67 @@ class Summarizer:
         result['authors'] = self._raw_info['authors']
         result['canonical_url'] = self._raw_info['opengraph']['url']
 
-        result['summarizaion'] = self.summarize_text('. '.join([description, text]),
-                                                     result_ratio=result_ratio,
-                                                     min_wordcount=min_wordcount,
-                                                     max_wordcount=max_wordcount)
-        result['keywords_'] = keywords(text='. '.join([title,
-                                                       description,
-                                                       text]),
-                                       ratio=0.25,
-                                       words=num_keywords, split=True, lemmatize=True)
+        key = self._result_key(title, description, text, settings.NEWS_SUMMARIZATION_ENGINE,
+                               num_keywords, result_ratio, min_wordcount, max_wordcount)
+        analysis = cache.get(key)
+        if analysis is not None:
+            _count('hits')
+            self._timings = {}
+            result.update(analysis)
+            return result
+        _count('misses')
+
+        stored_keywords, stored_summary = self._stored_analysis(description, text)
+        reuse_keywords = stored_keywords is not None and len(stored_keywords) >= num_keywords
+        summarization = stored_summarization(stored_summary, '. '.join([description, text]), result_ratio,
+                                             min_wordcount, max_wordcount)
+
+        if summarization is None:
+            summarization, article_keywords, self._timings = get_nlp_pool().run(
+                summarize_article, title, description, text, num_keywords, result_ratio,
+                min_wordcount, max_wordcount, extract_keywords=not reuse_keywords)
+        elif reuse_keywords:
+            self._timings = {}
+        else:
+            article_keywords, self._timings = get_nlp_pool().run(
+                extract_article_keywords, title, description, text, num_keywords)
+
+        analysis = {
+            'summarizaion': summarization,
+            'keywords_': stored_keywords[:num_keywords] if reuse_keywords else article_keywords,
+        }
+
+        logger.debug('Analyzed {} in {}'.format(self._url, ', '.join(
+            '{} {:.3f}s'.format(phase, seconds) for phase, seconds in self._timings.items())))
+
+        cache.set(key, analysis, RESULT_CACHE_TIMEOUT)
+        result.update(analysis)
 
         return result
 
+    @staticmethod
+    def _result_key(title, description, text, *parameters):
+        content = '\x00'.join([title, description, text]).encode('utf-8')
+        return '{}{}:{}'.format(RESULT_CACHE_PREFIX, hashlib.sha256(content).hexdigest(),
+                                ':'.join(str(parameter) for parameter in parameters))
+
+    def _stored_analysis(self, description, text):
+        """Get keywords of the stored article with the same URL and text, and its summary if
+        the description is the same too."""
+        urls = {self._url, self._raw_info['opengraph'].get('url') or self._url}
+        canonical_urls = {canonicalize_url(url) for url in urls}
+
+        article_model = apps.get_model('news', 'Article')
+        stored = article_model.objects \
+            .filter(Q(url__in=urls) | Q(canonical_url__in=canonical_urls)) \
+            .values_list('body__digest', 'keywords', 'description', 'summary') \
+            .first()
+
+        if stored is None or stored[0] != text_digest(text):
+            return None, None
+        # Ingested articles were summarized with the NewsAPI description, which may not be the page's.
+        return stored[1], stored[3] if stored[2] == description else None
+
     @property
     def raw_info(self):
         """ Dump pulled raw information.
@@ -88,35 +346,18 @@ class Summarizer:
         """
         return self._raw_info
 
-    def summarize_text(self, text, result_ratio=0.2, min_wordcount=50, max_wordcount=150):
-        original_length = self._count_words(text)
-
-        shrunk_wordcount = int(original_length * result_ratio)
-
-        if shrunk_wordcount < min_wordcount:
-            summary = summarize(text, word_count=min_wordcount)
-        elif shrunk_wordcount > max_wordcount:
-            summary = summarize(text, word_count=max_wordcount)
-        else:
-            summary = summarize(text, ratio=result_ratio)
-
-        if summary == '':
-            summary = text
+    @property
+    def timings(self):
+        """Seconds spent in each phase of the last analysis, empty if it was cached.
 
-        shrunk_length = self._count_words(summary)
-        shrinkage = round((original_length - shrunk_length) / original_length, 2)
+        Returns:
+            timings: dict, Seconds by phase.
+        """
+        return self._timings
 
-        return {
-            'summary': summary,
-            'original_length': original_length,
-            'summary_length': shrunk_length,
-            'shrinkage': shrinkage
-        }
+    def summarize_text(self, text, result_ratio=0.2, min_wordcount=50, max_wordcount=150):
+        return _summarize(TextAnalysis(text), result_ratio, min_wordcount, max_wordcount)
 
     @staticmethod
     def _count_words(text):
-        stripped = text.strip(string.punctuation)
-        if stripped == '':
-            return 0
-
-        return len(re.split(r'[^0-9A-Za-z]+', stripped))
+        return count_words(text)
@@ -1,17 +1,29 @@
+import functools
 import logging
 import os
 import re
 import time
+from itertools import islice
 
+from celery import chord, shared_task
+from celery.result import AsyncResult, GroupResult
+from django.db import transaction
 from newsapi.newsapi_client import NewsApiClient
-from requests.exceptions import Timeout
 
-from news.models import Article
+from news.models import Article, ArticleKeyword, CorpusTerm, NewsSource
+from .analysis import TextAnalysis
+from .blocklist import load_blocklist
+from .managers import article_source
+from .bodies import decompress_text
+from .pipeline import IngestionPipeline
+from .polling import SourcePoller
 from .secret_constants import API_KEY
 
 logger = logging.getLogger(__name__)
 base = os.path.dirname(os.path.abspath(__file__))
 
+HEADLINES_PER_TASK = 100
+
 
 def log_completion_time(task):
     """Log time needed to complete scheduled task
@@ -22,54 +34,100 @@ def log_completion_time(task):
     Returns:
         task_logged
     """
-    def task_logged():
+    @functools.wraps(task)
+    def task_logged(*args, **kwargs):
         start = int(round(time.time()))
-        task()
+        result = task(*args, **kwargs)
         end = int(round(time.time()))
         logger.info('Task completed in {} seconds'.format(end - start))
+        return result
     return task_logged
 
 
+@shared_task(name='news.pull_articles')
 @log_completion_time
 def pull_articles():
     # Pull news stories every 2 hours.
-    api = NewsApiClient(api_key=API_KEY)
-
-    # Fetch up-to-date sources.
-    base = os.path.dirname(os.path.abspath(__file__))
     with open(os.path.join(base, 'sources.txt'), 'r') as file:
-        sources = file.read().split('\n')
-
-    articles = []
-    for chunk_i in range(len(sources) // 10):
-        # Pull multiple sources at a time to minimize number of requests.
-        source_chunk = ', '.join(sources[chunk_i * 10: chunk_i * 10 + 10])
-        try:
-            articles += api.get_top_headlines(sources=source_chunk,
-                                              page_size=30)['articles']
-        except Timeout:
-            continue
-
-    undesirables = []
-    with open(os.path.join(base, 'undesirable_sources.txt'), 'r') as file:
-        for line in file:
-            undesirables.append(line)
-
-    for article in articles:
-        try:
-            Article.objects.create_article(
-                url=article['url'],
-                authors=article['author'],
-                publish_time=article['publishedAt'],
-                title_image=article['urlToImage'],
-                title=article['title'],
-                description=article['description'],
-                undesirables=undesirables
-            )
-        except:
-            continue
+        sources = [source for source in file.read().split('\n') if source]
+
+    # Only poll sources that are due, and keep headlines newer than what was seen before.
+    due = NewsSource.objects.due(sources)
+    articles, failed = SourcePoller(API_KEY).poll(due)
+    polled = [source for source in due if source not in failed]
+    articles = NewsSource.objects.new_articles(articles)
+    headlines = [{
+        'url': article['url'],
+        'authors': article['author'],
+        'publish_time': article['publishedAt'],
+        'title_image': article['urlToImage'],
+        'title': article['title'],
+        'description': article['description'],
+    } for article in articles]
+
+    chunks = [headlines[i:i + HEADLINES_PER_TASK] for i in range(0, len(headlines), HEADLINES_PER_TASK)]
+    if not chunks:
+        NewsSource.objects.record_poll(polled, articles)
+        return {'chunk_ids': [], 'chunks': 0, 'sources': len(due), 'headlines': 0}
+
+    # High-water marks only move once the headlines are ingested, so headlines that could
+    # not be ingested are polled again.
+    job = chord(ingest_headlines.s(chunk) for chunk in chunks)(record_poll.s(polled, articles))
+    # The chunks are the parent of the callback, a group unless there is a single chunk.
+    chunk_ids = [chunk.id for chunk in job.parent.results] if isinstance(job.parent, GroupResult) \
+        else [job.parent.id]
+
+    return {'chunk_ids': chunk_ids, 'chunks': len(chunks), 'sources': len(due), 'headlines': len(headlines)}
+
+
+@shared_task(name='news.record_poll')
+@log_completion_time
+def record_poll(chunk_stats, sources, articles):
+    """Record a poll once its headlines are ingested.
+
+    Sources of headlines in a chunk that failed keep their high-water mark. If a chunk
+    raised, this task does not run and every source stays due.
+
+    Args:
+        chunk_stats: list, Statistics returned by ingest_headlines for each chunk, in order.
+        sources: list, NewsAPI source ids that were polled.
+        articles: list, New articles returned by NewsAPI, in the order they were chunked.
+
+    Returns:
+        stats: dict, Number of sources recorded, and of those keeping their high-water mark.
+    """
+    failed_sources = {article_source(article) for index, article in enumerate(articles)
+                      if chunk_stats[index // HEADLINES_PER_TASK].get('failed')}
+    NewsSource.objects.record_poll(sources, articles, failed_sources=failed_sources)
+
+    return {'sources': len(sources), 'failed_sources': len(failed_sources & set(sources))}
+
 
+@shared_task(name='news.ingest_headlines')
+@log_completion_time
+def ingest_headlines(headlines):
+    """Ingest a chunk of polled headlines.
+
+    Args:
+        headlines: list, Dictionaries of keyword arguments to ArticleManager.create_article.
+
+    Returns:
+        stats: dict, Number of articles saved, skipped and failed, and seconds spent in
+            each phase of the analysis.
+    """
+    undesirables = load_blocklist(os.path.join(base, 'undesirable_sources.txt'))
 
+    stats = IngestionPipeline(Article.objects).run(headlines, undesirables=undesirables)
+    logger.info('{saved} articles saved, {skipped} skipped, {failed} failed'.format(
+        saved=stats['saved'], skipped=stats['skipped'], failed=stats['failed']))
+    logger.info('Analysis time by phase: {}'.format(', '.join(
+        '{} {:.2f}s'.format(key[:-len('_seconds')], value)
+        for key, value in sorted(stats.items()) if key.endswith('_seconds'))))
+
+    return dict(stats)
+
+
+@shared_task(name='news.update_sources')
 @log_completion_time
 def update_sources():
     # Update news sources once a month.
@@ -86,3 +144,80 @@ def update_sources():
         for source in sources:
             file.write(source)
             file.write('\n')
+
+    return {'sources': len(sources)}
+
+
+@shared_task(name='news.reindex_articles')
+@log_completion_time
+def reindex_articles(chunk_size=1000):
+    # Rebuild the keyword and full text search indexes and the counters from stored articles.
+    with transaction.atomic():
+        ArticleKeyword.objects.all().delete()
+
+        articles = Article.objects.only('identifier', 'keywords', 'publish_time').iterator()
+        chunk = list(islice(articles, chunk_size))
+        while chunk:
+            Article.objects.index_articles(chunk)
+            chunk = list(islice(articles, chunk_size))
+
+        Article.objects.recount_relations()
+
+    return {'articles': Article.objects.count()}
+
+
+@shared_task(name='news.rebuild_corpus_terms')
+@log_completion_time
+def rebuild_corpus_terms(chunk_size=200):
+    # Rebuild the document frequencies used by batch keyword extraction from stored articles.
+    with transaction.atomic():
+        CorpusTerm.objects.all().delete()
+
+        articles = Article.objects.values_list('title', 'description', 'body__content').iterator()
+        chunk = list(islice(articles, chunk_size))
+        while chunk:
+            CorpusTerm.objects.add_documents(
+                TextAnalysis('. '.join([description or '', decompress_text(content) if content else '']),
+                             title=title).terms()
+                for title, description, content in chunk)
+            chunk = list(islice(articles, chunk_size))
+
+    return {'terms': CorpusTerm.objects.count()}
+
+
+def job_status(job_id):
+    """Report the progress of a background job.
+
+    Args:
+        job_id: str, Id of the task returned when the job was enqueued.
+
+    Returns:
+        status: dict, State of the job, and progress and totals of fanned out chunks.
+    """
+    result = AsyncResult(job_id)
+    status = {'job_id': job_id, 'state': result.state}
+
+    if not result.successful():
+        return status
+
+    status['result'] = result.result
+    if not isinstance(result.result, dict) or not result.result.get('chunk_ids'):
+        return status
+
+    chunks = GroupResult(results=[AsyncResult(chunk_id) for chunk_id in result.result['chunk_ids']])
+
+    status['completed'] = chunks.completed_count()
+    status['total'] = len(chunks)
+
+    if not chunks.ready():
+        status['state'] = 'PROGRESS'
+        return status
+
+    totals = {}
+    for chunk in chunks.results:
+        if chunk.successful():
+            for key, value in chunk.result.items():
+                totals[key] = totals.get(key, 0) + value
+    status['result'] = totals
+
+    return status
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+from .bodies import compress_text, decompress_text, text_digest
+
+BACKFILL_CHUNK_SIZE = 500
+
+
+def copy_texts_to_bodies(apps, schema_editor):
+    """Create the ArticleBody rows of articles from their text column.
+
+    Must run after ArticleBody is created and before the text field is removed from Article.
+
+    Args:
+        apps: Apps, Historical models of the migration.
+        schema_editor: BaseDatabaseSchemaEditor, Editor of the migrated database.
+
+    Returns:
+        None
+    """
+    Article = apps.get_model('news', 'Article')
+    ArticleBody = apps.get_model('news', 'ArticleBody')
+    db = schema_editor.connection.alias
+
+    texts = (Article.objects.using(db).filter(text__isnull=False, body__isnull=True)
+             .order_by('pk').values_list('pk', 'text'))
+    bodies = []
+    for article_id, text in texts.iterator():
+        bodies.append(ArticleBody(article_id=article_id, content=compress_text(text), length=len(text),
+                                  digest=text_digest(text)))
+        if len(bodies) == BACKFILL_CHUNK_SIZE:
+            ArticleBody.objects.using(db).bulk_create(bodies)
+            bodies = []
+    ArticleBody.objects.using(db).bulk_create(bodies)
+
+
+def copy_bodies_to_texts(apps, schema_editor):
+    """Copy the texts of ArticleBody rows back to the text column of articles.
+
+    Reverses copy_texts_to_bodies, after the text field is added back to Article.
+
+    Args:
+        apps: Apps, Historical models of the migration.
+        schema_editor: BaseDatabaseSchemaEditor, Editor of the migrated database.
+
+    Returns:
+        None
+    """
+    Article = apps.get_model('news', 'Article')
+    ArticleBody = apps.get_model('news', 'ArticleBody')
+    db = schema_editor.connection.alias
+
+    for article_id, content in ArticleBody.objects.using(db).values_list('article_id', 'content').iterator():
+        Article.objects.using(db).filter(pk=article_id).update(text=decompress_text(content))
+
+
+def relation_operations(model_name, field_name, related_name, db_table, index):
+    """Operations turning an automatic many to many table of Article into a through model.
+
+    Django cannot add a through model to an existing many to many field. The state gets the
+    through model over the existing join table, whose rows are kept, and the table then gets
+    the created column, filled with the time of the migration, and the through model's indexes.
+
+    Args:
+        model_name: str, Name of the through model.
+        field_name: str, Name of the many to many field of Article.
+        related_name: str, Related name of the field.
+        db_table: str, Name of the join table.
+        index: Index, Index of the through model.
+
+    Returns:
+        operations: list, Migration operations.
+    """
+    def foreign_key(to, db_index):
+        return models.ForeignKey(db_index=db_index, on_delete=models.deletion.CASCADE, to=to)
+
+    return [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name=model_name,
+                fields=[
+                    ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('article', foreign_key('news.Article', True)),
+                    ('human', foreign_key(settings.AUTH_USER_MODEL, True)),
+                ],
+                options={'db_table': db_table, 'unique_together': {('article', 'human')}},
+            ),
+            migrations.AlterField(
+                model_name='article',
+                name=field_name,
+                field=models.ManyToManyField(blank=True, related_name=related_name, through='news.' + model_name,
+                                             to=settings.AUTH_USER_MODEL),
+            ),
+        ]),
+        migrations.AddField(
+            model_name=model_name.lower(),
+            name='created',
+            field=models.DateTimeField(default=timezone.now, verbose_name='created'),
+        ),
+        # The join table indexed both keys, which the unique index and the through model's index cover.
+        migrations.AlterField(model_name=model_name.lower(), name='article', field=foreign_key('news.Article', False)),
+        migrations.AlterField(model_name=model_name.lower(), name='human',
+                              field=foreign_key(settings.AUTH_USER_MODEL, False)),
+        migrations.AddIndex(model_name=model_name.lower(), index=index),
+    ]
+
+
+def article_relation_operations():
+    """Operations moving the saved, viewed and shared relations of Article to their through models.
+
+    Returns:
+        operations: list, Migration operations.
+    """
+    return (relation_operations('ArticleSave', 'saved_by', 'saved', 'news_article_saved_by',
+                                models.Index(fields=['human', '-created'], name='news_saved_by_human_idx')) +
+            relation_operations('ArticleView', 'viewed_by', 'viewed', 'news_article_viewed_by',
+                                models.Index(fields=['human', '-created'], name='news_viewed_by_human_idx')) +
+            relation_operations('ArticleShare', 'shared_by', 'shared', 'news_article_shared_by',
+                                models.Index(fields=['human', 'article'], name='news_shared_by_human_idx')))
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .analysis import TextAnalysis
+from .engines import get_engine
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TITLE = 'Warm analysis workers'
+WARM_UP_TEXT = ('Analysis workers load their language models once. They split articles into sentences '
+                'and extract keywords. Every later job reuses the loaded models. '
+                'Warm workers summarize articles without delay.')
+
+_pool = None
+_pool_lock = threading.Lock()
+_warm = False
+
+
+def get_nlp_pool():
+    """Get the pool of NLP workers shared by the process.
+
+    Returns:
+        pool: NLPWorkerPool, Shared pool.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = NLPWorkerPool()
+
+    return _pool
+
+
+def warm_up():
+    """Load the models used by text analysis in the current process.
+
+    Returns:
+        pid: int, Id of the warmed process.
+    """
+    global _warm
+
+    if not _warm:
+        analysis = TextAnalysis(WARM_UP_TEXT, title=WARM_UP_TITLE)
+        analysis.keywords()
+        get_engine().rank(analysis)
+        _warm = True
+
+    return os.getpid()
+
+
+def _run(fn, args, kwargs):
+    warm_up()
+    return fn(*args, **kwargs)
+
+
+class NLPWorkerPool:
+    """Long-lived worker processes for summarization and keyword extraction.
+
+    Workers start once per process, load gensim, the summarization engine and the
+    tagger as they start, and keep them for every later job, so neither web requests
+    nor ingestion pay the warm-up or hold the GIL while analyzing text. Jobs are
+    module-level functions sent over the executor's queue. A pool whose worker died is
+    replaced on the next submission. Daemonic processes, such as prefork Celery
+    workers, are not allowed to have children, so they run jobs in threads instead;
+    NEWS_INGEST_QUEUE routes ingestion to a solo pool worker that keeps the processes.
+    """
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers: int, Number of worker processes.
+        """
+        self.workers = workers or settings.NEWS_ANALYSIS_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a job to the workers.
+
+        Args:
+            fn: function, Module-level function to run, so it can be pickled.
+
+        Returns:
+            future: Future, Result of the job.
+        """
+        executor = self._get_executor()
+        try:
+            return executor.submit(_run, fn, args, kwargs)
+        except BrokenProcessPool:
+            logger.warning('NLP worker pool is broken, starting a new one')
+            self._discard(executor)
+            return self._get_executor().submit(_run, fn, args, kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        """Run a job on the workers and wait for its result."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._start()
+            return self._executor
+
+    def _start(self):
+        if multiprocessing.current_process().daemon:
+            logger.warning('Daemonic process %s runs NLP jobs in %d threads, run ingestion in a worker '
+                           'started with --pool=solo to analyze articles in worker processes',
+                           multiprocessing.current_process().name, self.workers)
+            return ThreadPoolExecutor(max_workers=self.workers)
+
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        for _ in range(self.workers):
+            executor.submit(warm_up)
+        atexit.register(self.shutdown)
+        return executor
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
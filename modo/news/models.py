@@ -1,23 +1,36 @@
+import copy
+
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from modo.util import auxiliary
-from .management.managers import ArticleManager
+from .management.bodies import decompress_text
+from .management.managers import (ArticleBodyManager, ArticleKeywordManager, ArticleManager, CorpusTermManager,
+                                  NewsSourceManager)
 from person.models import Human
 
+# Fields copied into the keyword index, whose entries are rebuilt when they change.
+KEYWORD_INDEX_FIELDS = {'keywords', 'publish_time'}
+# Fields the full text search vector is computed from, which is computed again when they change.
+SEARCH_VECTOR_FIELDS = {'title', 'keywords', 'description', 'summary'}
+INDEXED_FIELDS = KEYWORD_INDEX_FIELDS | SEARCH_VECTOR_FIELDS
+
 
 class Article(models.Model):
     identifier = models.BigIntegerField(_('identifier'), unique=True,
                                         primary_key=True, default=auxiliary.make_id)
     url = models.TextField(_('url'), unique=True)
+    canonical_url = models.TextField(_('canonical url'), null=True, blank=True, db_index=True)
     title = models.TextField(_('title'))
     slug = models.SlugField(_('slug title'), max_length=200, blank=True, null=True)
 
     authors = models.TextField(_('authors'), null=True)
     description = models.TextField(_('description'), null=True, blank=True)
     language = models.CharField(_('language'), max_length=10, default='en')
-    text = models.TextField(_('text'), null=True, blank=True)
     publish_time = models.DateTimeField(_('publish time'), null=True)
 
     site_name = models.CharField(_('site name'), max_length=50, null=True)
@@ -27,16 +40,176 @@ class Article(models.Model):
     summary = models.TextField(_('summarization'), null=True, blank=True)
     keywords = ArrayField(models.CharField(max_length=50), null=True, blank=True)
 
-    saved_by = models.ManyToManyField(Human, related_name='saved', blank=True)
-    viewed_by = models.ManyToManyField(Human, related_name='viewed', blank=True)
-    shared_by = models.ManyToManyField(Human, related_name='shared', blank=True)
+    saved_by = models.ManyToManyField(Human, related_name='saved', through='ArticleSave', blank=True)
+    viewed_by = models.ManyToManyField(Human, related_name='viewed', through='ArticleView', blank=True)
+    shared_by = models.ManyToManyField(Human, related_name='shared', through='ArticleShare', blank=True)
 
     views = models.IntegerField(_('views'), default=0)
+    saves = models.IntegerField(_('saves'), default=0)
+    shares = models.IntegerField(_('shares'), default=0)
+
+    search_vector = SearchVectorField(null=True, blank=True)
 
     objects = ArticleManager()
 
     class Meta:
         ordering = ['-publish_time', 'views']
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            # The feed, in cursor order, and the per-domain and per-language feeds.
+            models.Index(fields=['-publish_time', 'views'], name='news_article_feed_idx'),
+            models.Index(fields=['domain', '-publish_time'], name='news_article_domain_idx'),
+            models.Index(fields=['language', '-publish_time'], name='news_article_language_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @property
+    def text(self):
+        """Text of the article, loaded from its ArticleBody on first access.
+
+        Querysets annotated with the compressed `body_content` and the `text_length` of
+        the body provide the text without another query.
+        """
+        if not hasattr(self, '_text'):
+            if getattr(self, 'body_content', None) is not None:
+                self._text = decompress_text(self.body_content)
+            elif self._state.adding or getattr(self, 'text_length', 0) is None:
+                self._text = None
+            else:
+                self._text = ArticleBody.objects.text_of(self.pk)
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._text_changed = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        article = super().from_db(db, field_names, values)
+        article._remember_indexed()
+        return article
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, '_text_changed', False):
+                ArticleBody.objects.store([self])
+
+            # New articles are indexed by the manager once they are written.
+            changed = set() if adding else self._indexed_changes(kwargs.get('update_fields'))
+            if changed & KEYWORD_INDEX_FIELDS:
+                ArticleKeyword.objects.reindex_article(self)
+            if changed & SEARCH_VECTOR_FIELDS:
+                Article.objects.update_search_vectors([self])
+                self.refresh_from_db(fields=['search_vector'])
+        self._remember_indexed()
+
+    def _remember_indexed(self):
+        # Indexed values as loaded or last saved, copied since keywords may be changed in place.
+        deferred = self.get_deferred_fields()
+        self._indexed = {name: copy.copy(getattr(self, name)) for name in INDEXED_FIELDS
+                         if name not in deferred}
+
+    def _indexed_changes(self, update_fields=None):
+        """Indexed fields changed since the article was loaded or last saved.
+
+        Fields of an article that was not loaded, or whose values were deferred and have
+        been set since, count as changed.
+        """
+        indexed = getattr(self, '_indexed', {})
+        deferred = self.get_deferred_fields()
+        fields = INDEXED_FIELDS if update_fields is None else INDEXED_FIELDS & set(update_fields)
+        return {name for name in fields
+                if name not in deferred and (name not in indexed or getattr(self, name) != indexed[name])}
+
+
+class ArticleRelation(models.Model):
+    # Users of an article are found through the unique (article, human) index, and
+    # articles of a user through an index starting with human, so neither key needs its own.
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, db_index=False)
+    human = models.ForeignKey(Human, on_delete=models.CASCADE, db_index=False)
+    created = models.DateTimeField(_('created'), default=timezone.now)
+
+    class Meta:
+        abstract = True
+        unique_together = ('article', 'human')
+
+    def __str__(self):
+        return '{} {}'.format(self.article_id, self.human_id)
+
+
+class ArticleSave(ArticleRelation):
+    class Meta(ArticleRelation.Meta):
+        db_table = 'news_article_saved_by'
+        # Saved articles are listed most recently saved first.
+        indexes = [models.Index(fields=['human', '-created'], name='news_saved_by_human_idx')]
+
+
+class ArticleView(ArticleRelation):
+    class Meta(ArticleRelation.Meta):
+        db_table = 'news_article_viewed_by'
+        indexes = [models.Index(fields=['human', '-created'], name='news_viewed_by_human_idx')]
+
+
+class ArticleShare(ArticleRelation):
+    class Meta(ArticleRelation.Meta):
+        db_table = 'news_article_shared_by'
+        indexes = [models.Index(fields=['human', 'article'], name='news_shared_by_human_idx')]
+
+
+class ArticleBody(models.Model):
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='body')
+    content = models.BinaryField(_('compressed text'))
+    length = models.IntegerField(_('length'))
+    digest = models.CharField(_('digest'), max_length=64)
+
+    objects = ArticleBodyManager()
+
+    def __str__(self):
+        return str(self.article_id)
+
+
+class ArticleKeyword(models.Model):
+    keyword = models.CharField(_('keyword'), max_length=50)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='keyword_index')
+    publish_time = models.DateTimeField(_('publish time'), null=True)
+    # Component of the article's unit length keyword vector.
+    weight = models.FloatField(_('weight'), default=1.0)
+
+    objects = ArticleKeywordManager()
+
+    class Meta:
+        unique_together = ('keyword', 'article')
+        indexes = [models.Index(fields=['keyword', '-publish_time'])]
+
+    def __str__(self):
+        return self.keyword
+
+
+class NewsSource(models.Model):
+    identifier = models.BigIntegerField(_('identifier'), unique=True,
+                                        primary_key=True, default=auxiliary.make_id)
+    source = models.CharField(_('source'), max_length=100, unique=True)
+    high_water_mark = models.DateTimeField(_('newest publish time seen'), null=True)
+    poll_interval = models.IntegerField(_('poll interval'))
+    last_polled = models.DateTimeField(_('last polled'), null=True)
+    next_poll = models.DateTimeField(_('next poll'), null=True, db_index=True)
+
+    objects = NewsSourceManager()
+
+    def __str__(self):
+        return self.source
+
+
+class CorpusTerm(models.Model):
+    term = models.CharField(_('term'), max_length=50, primary_key=True)
+    documents = models.IntegerField(_('documents'), default=0)
+
+    objects = CorpusTermManager()
+
+    def __str__(self):
+        return self.term
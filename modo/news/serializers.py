@@ -2,8 +2,14 @@ from rest_framework import serializers
 
 from .models import Article
 
+# Fields whose representation of a database value is the value itself.
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField)
+
 
 class ArticleSerializer(serializers.HyperlinkedModelSerializer):
+    # Stored in ArticleBody, read and written through the Article.text property.
+    text = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
     class Meta:
         model = Article
         fields = (
@@ -76,3 +82,53 @@ class ArticleHeadlineSerializer(serializers.HyperlinkedModelSerializer):
             'site_name',
             'domain',
         ]
+
+
+class FastSerializer:
+    """Serialize .values() rows with the output of a model serializer.
+
+    The serializer's fields are inspected once to build a plan of (name, source,
+    converter), where the converter is None for fields that represent database values as
+    they are. Rows are then turned into dictionaries without building model instances or
+    going through the per-field serializer machinery.
+    """
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = [(name, field.source, self._converter(field))
+                          for name, field in self.serializer_class().fields.items()]
+        return self._plan
+
+    @property
+    def sources(self):
+        return [source for _, source, _ in self.plan]
+
+    @staticmethod
+    def _converter(field):
+        if type(field) in PASSTHROUGH_FIELDS:
+            return None
+        if isinstance(field, serializers.ListField) and type(field.child) in PASSTHROUGH_FIELDS:
+            return None
+        return field.to_representation
+
+    def values(self, queryset, *extra):
+        """Select the columns needed by the serializer, and any extra ones."""
+        return queryset.values(*self.sources, *[field for field in extra if field not in self.sources])
+
+    def to_representation(self, row):
+        data = {}
+        for name, source, converter in self.plan:
+            value = row[source]
+            data[name] = value if value is None or converter is None else converter(value)
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+fast_headline_serializer = FastSerializer(ArticleHeadlineSerializer)
+fast_summary_serializer = FastSerializer(ArticleSummarySerializer)
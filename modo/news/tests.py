@@ -1,5 +1,43 @@
+import json
+import os
+import tempfile
+import time
 import unittest
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from requests.exceptions import Timeout
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from modo.util import auxiliary
+from person.models import Human
+from . import serializers
+from .management.analysis import TextAnalysis
+from .management import tasks
+from .management.blocklist import DomainBlocklist
+from .management.buffers import ViewBuffer
+from .management.bodies import compress_text, iter_decompressed, iter_json_with_text
+from .management.canonical import canonicalize_url
+from .management.engines import NumpyEngine
+from .management.extraction import DiskExtractionCache, DjangoExtractionCache
+from .management.feed import feed_cache
+from .management.keywords import BatchKeywordExtractor
+from .management.managers import CREATED, DUPLICATE, INVALID, keyword_weights
+from .management.personal import PersonalFeed
+from .management.pipeline import IngestionPipeline
+from .management.polling import RateLimiter, SourcePoller
 from .management.summary import Summarizer
+from .models import Article, ArticleKeyword, ArticleSave, ArticleView, NewsSource
+from .views import NewsView
 
 
 class SummaryTestCase(unittest.TestCase):
@@ -14,5 +52,768 @@ class SummaryTestCase(unittest.TestCase):
         self.assertEqual(self.summarizer._count_words('The quick fox jumped over the lazy dog'), 8)
 
 
+class CanonicalUrlTestCase(unittest.TestCase):
+    def test_canonicalize_url(self):
+        self.assertEqual(canonicalize_url('http://www.Example.com/story/?utm_source=x&id=3&fbclid=y#top'),
+                         'https://example.com/story?id=3')
+        self.assertEqual(canonicalize_url('https://example.com:443/a?b=2&a=1'),
+                         'https://example.com/a?a=1&b=2')
+        self.assertEqual(canonicalize_url('https://example.com'), 'https://example.com/')
+        self.assertEqual(canonicalize_url('https://example.com:8080/a/'), 'https://example.com:8080/a')
+
+
+class ArticleBodyTestCase(unittest.TestCase):
+    def test_stream_text(self):
+        text = 'Ünïcode text, “quoted” and\nsplit over lines. ' * 2000
+        content = compress_text(text)
+        chunks = [content[i:i + 100] for i in range(0, len(content), 100)]
+
+        pieces = list(iter_decompressed(chunks))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual(''.join(pieces), text)
+
+        document = b''.join(iter_json_with_text(b'{"identifier":1}', pieces))
+        self.assertEqual(json.loads(document.decode('utf-8')), {'identifier': 1, 'text': text})
+
+
+class DiskExtractionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DiskExtractionCache(ttl=60, location=self.directory.name, max_entries=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        key = self.cache.digest('https://example.com/a?utm_source=feed')
+        self.assertEqual(key, self.cache.digest('http://www.example.com/a'))
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.set(key, {'info': {'title': 'A'}, 'etag': '"1"', 'stored_at': 0})
+        self.assertEqual(self.cache.get(key)['info'], {'title': 'A'})
+
+    def test_evicts_least_recently_used(self):
+        for i, key in enumerate(['a', 'b']):
+            self.cache.set(key, {'info': {}, 'stored_at': 0})
+            os.utime(self.cache._path(key), (i, i))
+
+        self.cache.set('c', {'info': {}, 'stored_at': 0})
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+
+class DjangoExtractionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        extraction = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'extraction-test'}
+        with override_settings(CACHES=dict(settings.CACHES, extraction=extraction)):
+            self.cache = DjangoExtractionCache(ttl=60, max_entries=3)
+
+    def test_bounded_size(self):
+        for key in 'abcdef':
+            self.cache.set(key, {'info': {}, 'stored_at': 0})
+
+        self.assertLessEqual(sum(self.cache.get(key) is not None for key in 'abcdef'), 3)
+        self.assertIsNotNone(self.cache.get('f'))
+
+    def test_entries_expire(self):
+        with mock.patch.object(self.cache.cache, 'set') as set_entry:
+            self.cache.set('a', {'info': {}, 'stored_at': 0})
+
+        set_entry.assert_called_once_with('news:extraction:a', {'info': {}, 'stored_at': 0}, timeout=240)
+
+
+class FastSerializerTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        Article.objects.create(url='https://example.com/news/1', title='Markets rally', authors='Jane Doe, John Doe',
+                               description='Stocks rose — №1', summary='Stocks rose. Bonds fell.',
+                               keywords=['stocks', 'bonds'], site_name='Example News', domain='example.com',
+                               images='https://example.com/images/1.jpg', publish_time=now)
+        Article.objects.create(url='https://example.com/news/2', title='Quiet day', domain='example.com',
+                               publish_time=now - timedelta(hours=1))
+        Article.objects.create(url='https://example.com/news/3', title='No date')
+
+    def test_output_matches_model_serializers(self):
+        articles = Article.objects.order_by('identifier')
+        renderer = JSONRenderer()
+
+        for serializer_class, fast_serializer in [
+                (serializers.ArticleHeadlineSerializer, serializers.fast_headline_serializer),
+                (serializers.ArticleSummarySerializer, serializers.fast_summary_serializer)]:
+            self.assertEqual(renderer.render(serializer_class(articles, many=True).data),
+                             renderer.render(fast_serializer.serialize(articles.values())))
+
+
+class SourcePollerTestCase(unittest.TestCase):
+    def test_poll_covers_every_source(self):
+        polled = []
+
+        class RecordingPoller(SourcePoller):
+            def poll_chunk(self, sources, page_size=30):
+                polled.extend(sources)
+                return [{'source': source} for source in sources]
+
+        sources = ['source-{}'.format(i) for i in range(25)]
+        poller = RecordingPoller('key', workers=4, rate=1000, timeout=1, retries=0)
+
+        articles, failed = poller.poll(sources)
+        self.assertEqual(len(articles), 25)
+        self.assertEqual(failed, [])
+        self.assertEqual(sorted(polled), sorted(sources))
+
+    @mock.patch('news.management.polling.time.sleep')
+    def test_retries_with_backoff(self, sleep):
+        poller = SourcePoller('key', workers=1, rate=1000, timeout=1, retries=3, backoff=0.5)
+        limited, unavailable, ok = mock.Mock(status_code=429), mock.Mock(status_code=503), mock.Mock(status_code=200)
+        ok.json.return_value = {'articles': [{'title': 'Headline'}]}
+
+        with mock.patch.object(poller.limiter, 'acquire') as acquire, \
+                mock.patch.object(poller.session, 'get', side_effect=[limited, Timeout(), unavailable, ok]) as get, \
+                mock.patch('news.management.polling.random.uniform', side_effect=lambda low, high: high):
+            articles = poller.poll_chunk(['bbc-news'])
+
+        self.assertEqual(articles, [{'title': 'Headline'}])
+        self.assertEqual(get.call_count, 4)
+        self.assertEqual(acquire.call_count, 4)
+        self.assertEqual([call[0][0] for call in sleep.call_args_list], [0.5, 1.0, 2.0])
+
+    @mock.patch('news.management.polling.time.sleep')
+    def test_gives_up_after_retries(self, sleep):
+        poller = SourcePoller('key', workers=1, rate=1000, timeout=1, retries=2, backoff=0.5)
+
+        with mock.patch.object(poller.limiter, 'acquire'), \
+                mock.patch.object(poller.session, 'get', return_value=mock.Mock(status_code=502)) as get:
+            self.assertIsNone(poller.poll_chunk(['bbc-news']))
+
+        self.assertEqual(get.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @mock.patch('news.management.polling.time.sleep')
+    @mock.patch('news.management.polling.time.monotonic', return_value=100.0)
+    def test_rate_limiter_spaces_calls(self, _, sleep):
+        limiter = RateLimiter(4)
+        for _ in range(3):
+            limiter.acquire()
+
+        self.assertEqual([call[0][0] for call in sleep.call_args_list], [0.25, 0.5])
+
+
+class DomainBlocklistTestCase(unittest.TestCase):
+    def test_blocks_domains_and_subdomains(self):
+        blocklist = DomainBlocklist(['Example.com\n', '', 'www.blocked.org', 'https://spam.net/feed'])
+
+        self.assertTrue(blocklist.blocks('example.com'))
+        self.assertTrue(blocklist.blocks('https://news.example.com/story'))
+        self.assertTrue(blocklist.blocks('blocked.org'))
+        self.assertTrue('cdn.spam.net' in blocklist)
+        self.assertFalse(blocklist.blocks('notexample.com'))
+        self.assertFalse(blocklist.blocks('com'))
+        self.assertFalse(blocklist.blocks(''))
+
+
+class TextAnalysisTestCase(unittest.TestCase):
+    def test_shared_analysis(self):
+        analysis = TextAnalysis('Cats chase mice. Mice hide from the cats! It rained.', title='Barn life')
+
+        self.assertEqual([unit.text for unit in analysis.sentences],
+                         ['Cats chase mice.', 'Mice hide from the cats!', 'It rained.'])
+        self.assertEqual(analysis.sentences[0].token, 'cat chase mice')
+        self.assertEqual(analysis.tokens[:3], ['barn', 'life', 'cats'])
+        self.assertEqual(analysis.word_count(), 10)
+        self.assertEqual(analysis.word_count([0, 2]), 5)
+
+        self.assertTrue({'split', 'normalize', 'tokenize', 'count'} <= set(analysis.timings))
+
+    def test_keywords_of_short_texts(self):
+        self.assertEqual(TextAnalysis('Economy').keywords(), [])
+        self.assertEqual(TextAnalysis('the and of it was').keywords(), [])
+        self.assertIn('markets', TextAnalysis('Markets fell.').keywords())
+
+
+class BatchKeywordExtractorTestCase(unittest.TestCase):
+    def test_rank(self):
+        documents = [
+            {'said': (4, 'said'), 'senat': (2, 'senate'), 'vote': (2, 'votes')},
+            {'said': (5, 'said'), 'goal': (3, 'goals'), 'match': (1, 'match')},
+            {},
+        ]
+        keywords = BatchKeywordExtractor(words=2).rank(documents, 100, {'said': 90, 'vote': 5})
+
+        self.assertEqual(keywords, [['senate', 'votes'], ['goals', 'match'], []])
+
+
+class NumpyEngineTestCase(unittest.TestCase):
+    def test_select(self):
+        text = ('Cats chase mice in the barn. Mice hide from cats in the barn. '
+                'The weather was sunny. Cats and mice live in the barn.')
+        ranking = NumpyEngine().prepare(text)
+
+        self.assertEqual(len(ranking.sentences), 4)
+        self.assertEqual(ranking.select(ratio=0.5).split('\n'), [
+            'Cats chase mice in the barn.', 'Mice hide from cats in the barn.'])
+        self.assertNotIn('sunny', ranking.select(word_count=12))
+        self.assertEqual(NumpyEngine().prepare('Only one sentence.').select(), '')
+
+
+class PersonalFeedTestCase(unittest.TestCase):
+    def test_keyword_weights(self):
+        weights = keyword_weights(['Senate', 'vote', 'senate', 'budget'])
+
+        self.assertEqual(list(weights), ['senate', 'vote', 'budget'])
+        self.assertAlmostEqual(sum(weight ** 2 for weight in weights.values()), 1.0)
+        self.assertAlmostEqual(weights['senate'], 2 * weights['vote'])
+        self.assertEqual(keyword_weights(None), {})
+
+    def test_rank_key(self):
+        feed = PersonalFeed(window=86400, half_life=3600, size=10, timeout=60)
+
+        # A match twice as good is worth one half life of age, whenever it is ranked.
+        self.assertAlmostEqual(feed.rank_key(1.0, 7200), feed.rank_key(2.0, 3600))
+        self.assertGreater(feed.rank_key(0.5, 10000), feed.rank_key(1.0, 3600))
+        self.assertEqual(PersonalFeed.normalize({'keywords': [' Senate', 'senate', ''],
+                                                 'sources': ['https://www.BBC.co.uk/news']}),
+                         (['senate'], ['bbc.co.uk']))
+
+
+class IdGeneratorTestCase(unittest.TestCase):
+    def test_make_ids(self):
+        ids = auxiliary.make_ids(10000) + [auxiliary.make_id()]
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertLess(ids[-1], 1 << 63)
+        self.assertLessEqual(abs(auxiliary.reverse_id(ids[-1]) - time.time()), 2)
+
+    @mock.patch.dict(os.environ, {'ID_WORKER': ''})
+    def test_leased_workers(self):
+        first, second = auxiliary.IdGenerator(), auxiliary.IdGenerator()
+
+        self.assertNotEqual(first.worker, second.worker)
+        self.assertFalse(set(first.make_ids(5000)) & set(second.make_ids(5000)))
+        with self.assertRaises(ValueError):
+            auxiliary.IdGenerator(worker=auxiliary.MAX_WORKER + 1).make_ids(1)
+
+    @mock.patch.dict(os.environ, {'ID_WORKER': ''})
+    def test_counter_starts_at_zero(self):
+        cache.delete(auxiliary.WORKER_KEY_PREFIX + 'next')
+        generator = auxiliary.IdGenerator()
+
+        # Worker ids already leased by other generators are skipped.
+        self.assertEqual(generator.worker, cache.get(auxiliary.WORKER_KEY_PREFIX + 'next') - 1)
+        self.assertEqual(cache.get(auxiliary.WORKER_KEY_PREFIX + str(generator.worker)), generator._token)
+
+    @mock.patch.dict(os.environ, {'ID_WORKER': ''})
+    def test_private_cache_refused(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            with self.assertRaises(RuntimeError):
+                auxiliary.IdGenerator().make_ids(1)
+            self.assertEqual(auxiliary.IdGenerator(worker=7).worker, 7)
+            with mock.patch.dict(os.environ, {'ID_WORKER': '8'}):
+                self.assertEqual(auxiliary.IdGenerator().worker, 8)
+
+    def test_reverse_legacy_id(self):
+        legacy = ((1500000000 - auxiliary.START_TIME) << 23) | 4194303
+
+        self.assertEqual(auxiliary.reverse_id(legacy), 1500000000)
+        self.assertLess(legacy, auxiliary.make_id())
+
+
+class NewsSourceTestCase(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.mark = self.now - timedelta(hours=3)
+
+    @staticmethod
+    def article(source, published):
+        return {'source': {'id': source}, 'publishedAt': published.isoformat(), 'url': 'https://example.com/news',
+                'author': None, 'urlToImage': None, 'title': 'Headline', 'description': 'About it.'}
+
+    def marks(self):
+        return {state.source: (state.high_water_mark, state.poll_interval, state.next_poll)
+                for state in NewsSource.objects.all()}
+
+    def test_due(self):
+        NewsSource.objects.create(source='quiet', poll_interval=7200, next_poll=self.now + timedelta(hours=1))
+        NewsSource.objects.create(source='soon', poll_interval=7200, next_poll=self.now + timedelta(minutes=3))
+        NewsSource.objects.create(source='late', poll_interval=7200, next_poll=self.now - timedelta(minutes=1))
+
+        self.assertEqual(NewsSource.objects.due(['new', 'quiet', 'soon', 'late'], now=self.now),
+                         ['new', 'soon', 'late'])
+
+    @override_settings(NEWS_POLL_MIN_INTERVAL=3600, NEWS_POLL_MAX_INTERVAL=4 * 3600)
+    def test_record_poll(self):
+        for source, interval in [('busy', 7200), ('quiet', 3 * 3600), ('broken', 7200)]:
+            NewsSource.objects.create(source=source, poll_interval=interval, high_water_mark=self.mark)
+        hour = timedelta(hours=1)
+        articles = [self.article('busy', self.mark), self.article('busy', self.mark + hour),
+                    self.article('busy', self.mark + 2 * hour), self.article('broken', self.mark + hour),
+                    self.article('new', self.mark), {'source': None, 'publishedAt': None}]
+
+        new_articles = NewsSource.objects.new_articles(articles)
+        self.assertEqual(new_articles, articles[1:])
+
+        NewsSource.objects.record_poll(['busy', 'quiet', 'broken', 'new'], new_articles, failed_sources={'broken'},
+                                       now=self.now)
+        self.assertEqual(self.marks(), {
+            'busy': (self.mark + 2 * hour, 3600, self.now + hour),
+            'quiet': (self.mark, 4 * 3600, self.now + 4 * hour),
+            'broken': (self.mark, 7200, self.now + hour),
+            'new': (self.mark, 3600, self.now + hour),
+        })
+
+    def test_pull_recorded_once_ingested(self):
+        articles = [self.article('busy', self.mark)]
+        with mock.patch('news.management.tasks.open', mock.mock_open(read_data='busy\n'), create=True), \
+                mock.patch('news.management.tasks.SourcePoller') as poller, \
+                mock.patch('news.management.tasks.chord') as chord:
+            poller.return_value.poll.return_value = (articles, set())
+            result = tasks.pull_articles()
+
+        self.assertEqual(result['chunks'], 1)
+        self.assertFalse(NewsSource.objects.exists())
+        (header,), _ = chord.call_args
+        self.assertEqual([chunk.args[0][0]['publish_time'] for chunk in header], [articles[0]['publishedAt']])
+
+        tasks.record_poll([{'saved': 0, 'failed': 1}], ['busy'], articles)
+        self.assertIsNone(NewsSource.objects.get(source='busy').high_water_mark)
+
+        tasks.record_poll([{'saved': 1}], ['busy'], articles)
+        self.assertEqual(NewsSource.objects.get(source='busy').high_water_mark, self.mark)
+
+
+class CreateArticlesTestCase(TestCase):
+    def setUp(self):
+        self.stored = Article.objects.create(url='https://example.com/news/0', title='Stored')
+
+    @staticmethod
+    def build(i, title=None):
+        article = Article(url='https://example.com/news/{}'.format(i),
+                          title='Headline {}'.format(i) if title is None else title,
+                          authors='Jane Doe', site_name='Example News', keywords=['economy'],
+                          publish_time=timezone.now())
+        article.text = 'Text of article {}.'.format(i)
+        return article
+
+    def test_outcomes(self):
+        articles = [self.build(1), self.build(0), self.build(2, title=''), self.build(1)]
+
+        self.assertEqual(Article.objects.create_articles(articles), [CREATED, DUPLICATE, INVALID, DUPLICATE])
+        created = Article.objects.get(url='https://example.com/news/1')
+        self.assertEqual(created.text, 'Text of article 1.')
+        self.assertEqual(list(ArticleKeyword.objects.filter(article=created).values_list('keyword', flat=True)),
+                         ['economy'])
+
+    def test_colliding_identifier_written_row_by_row(self):
+        articles = [self.build(1), self.build(2)]
+
+        with mock.patch('news.management.managers.auxiliary.make_ids',
+                        return_value=[self.stored.identifier, 6000000000000000]):
+            self.assertEqual(Article.objects.create_articles(articles), [CREATED, CREATED])
+
+        self.assertNotEqual(articles[0].identifier, self.stored.identifier)
+        self.assertEqual(Article.objects.get(identifier=articles[0].identifier).text, 'Text of article 1.')
+        self.assertEqual(Article.objects.get(identifier=6000000000000000).text, 'Text of article 2.')
+        self.assertEqual(Article.objects.get(identifier=self.stored.identifier).title, 'Stored')
+
+    def test_url_stored_concurrently(self):
+        article = self.build(0)
+
+        self.assertEqual(Article.objects._create_one(article), DUPLICATE)
+        self.assertEqual(Article.objects.count(), 1)
+
+
+class ArticleKeywordTestCase(TestCase):
+    def test_keywords_differing_in_case(self):
+        article = Article.objects.create(url='https://example.com/news/1', title='First',
+                                         keywords=['Senate', 'senate', 'Vote'], publish_time=timezone.now())
+        ArticleKeyword.objects.index_articles([article])
+
+        self.assertEqual(sorted(ArticleKeyword.objects.filter(article=article).values_list('keyword', flat=True)),
+                         ['senate', 'vote'])
+
+    def test_index_follows_updates(self):
+        published = timezone.now() - timedelta(days=2)
+        article = Article.objects.create(url='https://example.com/news/1', title='First', keywords=['Senate', 'vote'],
+                                         publish_time=published)
+        ArticleKeyword.objects.index_articles([article])
+
+        article = Article.objects.get(identifier=article.identifier)
+        article.keywords.append('budget')
+        article.save()
+        self.assertEqual(sorted(ArticleKeyword.objects.filter(article=article).values_list('keyword', 'publish_time')),
+                         [('budget', published), ('senate', published), ('vote', published)])
+
+        client = APIClient()
+        client.force_authenticate(Human.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        moved = (timezone.now() - timedelta(hours=1)).replace(microsecond=0)
+        response = client.patch('/news/{}/'.format(article.identifier), {'publish_time': moved.isoformat()})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(set(ArticleKeyword.objects.filter(article=article).values_list('publish_time', flat=True)),
+                         {moved})
+        self.assertEqual(ArticleKeyword.objects.related(0, ['budget'], timezone.now(), window=timedelta(days=1)),
+                         [article.identifier])
+
+
+class RelationTestCase(TestCase):
+    def setUp(self):
+        self.reader = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        self.other = Human.objects.create_user('other', 'other@example.com', 'password')
+        self.article = Article.objects.create(url='https://example.com/news/1', title='First')
+
+    def counters(self):
+        article = Article.objects.get(identifier=self.article.identifier)
+        return article.saves, article.views, article.shares
+
+    def test_add_is_idempotent(self):
+        self.assertTrue(Article.objects.add_relation('saved_by', self.article.identifier, self.reader.identifier))
+        saved = ArticleSave.objects.get(human=self.reader).created
+
+        self.assertFalse(Article.objects.add_relation('saved_by', self.article.identifier, self.reader.identifier))
+        self.assertEqual(self.counters(), (1, 0, 0))
+        self.assertEqual(list(ArticleSave.objects.values_list('created', flat=True)), [saved])
+
+    def test_save_toggles(self):
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        url = '/news/{}/save/'.format(self.article.identifier)
+
+        self.assertEqual(client.get(url).data['message'], '"First" is saved.')
+        self.assertEqual(self.counters(), (1, 0, 0))
+        self.assertEqual(client.get(url).data['message'], '"First" is no longer saved.')
+        self.assertEqual(self.counters(), (0, 0, 0))
+        self.assertFalse(ArticleSave.objects.exists())
+
+    def test_counters_after_repeated_changes(self):
+        for relation in ['saved_by', 'viewed_by', 'shared_by']:
+            for _ in range(3):
+                for human in [self.reader, self.other]:
+                    Article.objects.add_relation(relation, self.article.identifier, human.identifier)
+                self.assertTrue(Article.objects.remove_relation(relation, self.article.identifier,
+                                                                self.reader.identifier))
+                self.assertFalse(Article.objects.remove_relation(relation, self.article.identifier,
+                                                                 self.reader.identifier))
+        self.assertEqual(self.counters(), (1, 1, 1))
+
+        added = Article.objects.add_relations('viewed_by', [
+            (self.article.identifier, self.reader.identifier, timezone.now()),
+            (self.article.identifier, self.reader.identifier, timezone.now()),
+            (self.article.identifier, self.other.identifier, timezone.now()),
+            (0, self.reader.identifier, timezone.now()),
+        ])
+        self.assertEqual(added, 1)
+        self.assertEqual(self.counters(), (1, 2, 1))
+
+        Article.objects.recount_relations()
+        self.assertEqual(self.counters(), (1, 2, 1))
+
+
+class SearchTestCase(TestCase):
+    def search(self, terms):
+        response = APIClient().get('/news/', {'search': terms})
+        return [article['title'] for article in response.data['results']]
+
+    def test_search_after_update(self):
+        article = Article.objects.create(url='https://example.com/news/1', title='Senate passes the bill',
+                                         publish_time=timezone.now())
+        Article.objects.index_articles([article])
+        self.assertEqual(self.search('senate'), ['Senate passes the bill'])
+
+        client = APIClient()
+        client.force_authenticate(Human.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = client.patch('/news/{}/'.format(article.identifier), {'title': 'Budget talks stall'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.search('senate'), [])
+        self.assertEqual(self.search('budget'), ['Budget talks stall'])
+
+        article = Article.objects.get(identifier=article.identifier)
+        article.description = 'Lawmakers adjourn.'
+        article.save()
+        article.save()
+        self.assertEqual(self.search('lawmakers budget'), ['Budget talks stall'])
+
+
+class ArticleRetrieveTestCase(TestCase):
+    def test_text_loaded_with_article(self):
+        article = Article(url='https://example.com/news/1', title='First')
+        article.text = 'Text of the article.'
+        article.save()
+        bare = Article.objects.create(url='https://example.com/news/2', title='Second')
+
+        with self.assertNumQueries(1):
+            response = APIClient().get('/news/{}/'.format(article.identifier))
+        self.assertEqual(response.data['text'], 'Text of the article.')
+
+        with self.assertNumQueries(1):
+            response = APIClient().get('/news/{}/'.format(bare.identifier))
+        self.assertIsNone(response.data['text'])
+
+
+class NewsPermissionsTestCase(TestCase):
+    def setUp(self):
+        self.reader = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        self.article = Article.objects.create(url='https://example.com/news/1', title='First')
+        self.client = APIClient()
+
+    def test_anonymous_requests(self):
+        for url in ['/news/personal/', '/news/{}/save/'.format(self.article.identifier)]:
+            self.assertIn(self.client.get(url).status_code, [401, 403])
+        self.assertEqual(self.client.get('/news/').status_code, 200)
+        self.assertFalse(ArticleSave.objects.exists())
+
+    def test_action_permissions(self):
+        self.client.force_authenticate(self.reader)
+        self.assertEqual(self.client.get('/news/personal/').status_code, 200)
+        self.assertEqual(self.client.post('/news/get_primary_key/', {'url': self.article.url}).status_code, 403)
+        self.assertEqual(self.client.delete('/news/{}/'.format(self.article.identifier)).status_code, 403)
+
+
+class FeedCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = Human.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.article = Article.objects.create(url='https://example.com/news/1', title='First',
+                                              publish_time=timezone.now())
+        self.client = APIClient()
+
+    def get_feed(self):
+        """Get the feed, with the number of times it was rendered rather than served from the cache."""
+        with mock.patch.object(NewsView, '_list_headlines', autospec=True,
+                               side_effect=NewsView._list_headlines) as render:
+            response = self.client.get('/news/')
+        self.assertEqual(response.status_code, 200)
+        return [article['title'] for article in json.loads(response.content.decode('utf-8'))['results']], \
+            render.call_count
+
+    def page_key(self):
+        return feed_cache._key(cache.get(feed_cache.generation_key, 0), 'page', 'http://testserver/news/')
+
+    def test_pages_served_from_cache(self):
+        self.assertEqual(self.get_feed(), (['First'], 1))
+        self.assertEqual(self.get_feed(), (['First'], 0))
+
+    def test_invalidated_by_update_and_delete(self):
+        self.get_feed()
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch('/news/{}/'.format(self.article.identifier), {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get_feed(), (['Renamed'], 1))
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.delete('/news/{}/'.format(self.article.identifier)).status_code, 200)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get_feed(), ([], 1))
+
+    @mock.patch('news.management.pipeline.transaction.on_commit', side_effect=lambda function: function())
+    def test_invalidated_by_ingestion(self, _):
+        self.get_feed()
+
+        headline = {'url': 'https://example.com/news/2', 'authors': None, 'publish_time': None,
+                    'title_image': None, 'title': 'Second', 'description': 'About the second story.'}
+        info = {'opengraph': {'site_name': 'Example News'}, 'domain': 'example.com', 'meta': {'lang': 'en'},
+                'cleaned_text': 'Text of the second story.'}
+        pipeline = IngestionPipeline(Article.objects, fetch_workers=1, analysis_pool=mock.Mock(), max_pending=1,
+                                     batch_size=1, batch_keywords=False)
+        stats = Counter()
+        pipeline._write([(headline, info, ['story'], 'Summary.')], stats)
+
+        self.assertEqual(stats['saved'], 1)
+        self.assertEqual(self.get_feed(), (['Second', 'First'], 1))
+
+    def test_waits_for_page_rendered_concurrently(self):
+        page_key = self.page_key()
+        cache.add(page_key + ':lock', 1)
+
+        # Another request renders the page while this one waits.
+        rendered = b'{"results":[]}'
+        with mock.patch('news.management.feed.time.sleep', side_effect=lambda _: cache.set(page_key, rendered)):
+            self.assertEqual(self.get_feed(), ([], 0))
+
+    def test_renders_without_caching_when_lock_held(self):
+        page_key = self.page_key()
+        cache.add(page_key + ':lock', 1)
+
+        with mock.patch.object(feed_cache, 'wait', 0):
+            self.assertEqual(self.get_feed(), (['First'], 1))
+        self.assertIsNone(cache.get(page_key))
+
+
+class StoredSummaryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        text = ' '.join('Sentence number {} of the story has eleven words in it.'.format(i) for i in range(30))
+        self.raw_info = {'title': 'Story', 'meta': {'description': 'About the story.', 'lang': 'en'},
+                         'cleaned_text': text, 'domain': 'example.com',
+                         'opengraph': {'type': 'article', 'url': None}, 'authors': []}
+
+        article = Article(url='https://example.com/news/1', title='Story', description='About the story.',
+                          summary='Stored summary of the story.',
+                          keywords=['story', 'sentence', 'number', 'words', 'ten'])
+        article.text = text
+        article.save()
+
+    def fetch(self, **parameters):
+        with mock.patch('news.management.summary.extract_info', return_value=self.raw_info), \
+                mock.patch('news.management.summary.get_nlp_pool') as get_nlp_pool:
+            get_nlp_pool.return_value.run.side_effect = lambda function, *args, **kwargs: function(*args, **kwargs)
+            result = Summarizer().fetch('https://example.com/news/1', **parameters)
+        return result, get_nlp_pool.return_value.run
+
+    def test_stored_summary_reused(self):
+        result, run = self.fetch()
+
+        run.assert_not_called()
+        self.assertEqual(result['summarizaion'], {'summary': 'Stored summary of the story.', 'original_length': 333,
+                                                  'summary_length': 5, 'shrinkage': 0.98})
+        self.assertEqual(result['keywords_'], ['story', 'sentence', 'number', 'words', 'ten'])
+
+    def test_other_lengths_summarized(self):
+        result, run = self.fetch(result_ratio=0.3)
+
+        self.assertEqual(run.call_count, 1)
+        self.assertNotEqual(result['summarizaion']['summary'], 'Stored summary of the story.')
+
+        result, run = self.fetch(max_wordcount=40, min_wordcount=20)
+
+        self.assertEqual(run.call_count, 1)
+        self.assertNotEqual(result['summarizaion']['summary'], 'Stored summary of the story.')
+
+    def test_other_description_summarized(self):
+        self.raw_info['meta']['description'] = 'Description of the page.'
+        result, run = self.fetch()
+
+        self.assertEqual(run.call_count, 1)
+        self.assertNotEqual(result['summarizaion']['summary'], 'Stored summary of the story.')
+        self.assertEqual(result['keywords_'], ['story', 'sentence', 'number', 'words', 'ten'])
+
+    def test_metrics(self):
+        self.fetch()
+        self.fetch()
+
+        output = StringIO()
+        call_command('summary_cache', stdout=output)
+        self.assertEqual(output.getvalue(), '1 hits, 1 misses, hit ratio 0.5\n')
+
+
+class ViewBufferTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch.object(ViewBuffer, '_start')
+    def test_flush_keeps_view_times(self, _):
+        human = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        first = Article.objects.create(url='https://example.com/news/1', title='First')
+        second = Article.objects.create(url='https://example.com/news/2', title='Second')
+        viewed = timezone.now() - timedelta(minutes=10)
+        buffer = ViewBuffer(flush_interval=60, max_size=10, dedup_timeout=60)
+
+        with mock.patch('news.management.buffers.timezone.now', side_effect=[viewed, viewed + timedelta(minutes=1)]):
+            buffer.record(second.identifier, human.identifier)
+            buffer.record(first.identifier, human.identifier)
+        self.assertEqual(buffer.flush(), 2)
+
+        views = ArticleView.objects.filter(human=human).order_by('-created')
+        self.assertEqual([(view.article_id, view.created) for view in views],
+                         [(first.identifier, viewed + timedelta(minutes=1)), (second.identifier, viewed)])
+
+    @mock.patch.object(ViewBuffer, '_start')
+    def test_views_are_remembered_once_written(self, _):
+        human = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        article = Article.objects.create(url='https://example.com/news/1', title='First')
+        buffer = ViewBuffer(flush_interval=60, max_size=10, dedup_timeout=60)
+
+        self.assertTrue(buffer.record(article.identifier, human.identifier))
+        self.assertFalse(buffer.record(article.identifier, human.identifier))
+
+        # A buffer lost before flushing leaves nothing behind, the view can be recorded again.
+        lost = ViewBuffer(flush_interval=60, max_size=10, dedup_timeout=60)
+        self.assertTrue(lost.record(article.identifier, human.identifier))
+
+        buffer.flush()
+        self.assertTrue(lost.seen(article.identifier, human.identifier))
+        self.assertEqual(Article.objects.get(identifier=article.identifier).views, 1)
+
+    @mock.patch.object(ViewBuffer, '_start')
+    def test_view_of_unknown_article(self, _):
+        human = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        article = Article.objects.create(url='https://example.com/news/1', title='First')
+        client = APIClient()
+        client.force_authenticate(human)
+
+        self.assertEqual(client.get('/news/{}/view/'.format(article.identifier)).status_code, 200)
+        self.assertEqual(client.get('/news/1/view/').status_code, 404)
+
+
+@unittest.skipUnless(os.environ.get('NEWS_QUERY_PLAN_ROWS'),
+                     'Set NEWS_QUERY_PLAN_ROWS to the number of articles to seed, a few million.')
+class QueryPlanTestCase(TestCase):
+    """Regression test of the indexes used by feed and relation queries on a large table."""
+    @classmethod
+    def setUpTestData(cls):
+        rows = int(os.environ['NEWS_QUERY_PLAN_ROWS'])
+        users = max(rows // 100, 100)
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO person_human (identifier, username, email, password, first_name, last_name,
+                    registered_since, is_active, is_staff, is_superuser, settings, interests)
+                SELECT g, 'user' || g, 'user' || g || '@example.com', '', '', '', now(), true, false,
+                    false, '{}', '{}'
+                FROM generate_series(1, %s) g
+            """, [users])
+            cursor.execute("""
+                INSERT INTO news_article (identifier, url, title, language, domain, publish_time,
+                    views, saves, shares)
+                SELECT g, 'https://example.com/news/' || g, 'Headline ' || g,
+                    (ARRAY['en', 'en', 'en', 'en', 'de', 'fr', 'es'])[1 + g %% 7], 'site' || g %% 500 || '.com',
+                    now() - g * interval '1 minute', 0, 0, 0
+                FROM generate_series(1, %s) g
+            """, [rows])
+            cursor.execute("""
+                INSERT INTO news_article_saved_by (article_id, human_id, created)
+                SELECT g, 1 + g %% %s, now() - g * interval '1 second' FROM generate_series(1, %s) g
+            """, [users, rows])
+            cursor.execute('ANALYZE person_human, news_article, news_article_saved_by')
+
+    def assertUsesIndex(self, queryset, index):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+
+        indexes = set()
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if 'Index Name' in node:
+                indexes.add(node['Index Name'])
+            nodes += node.get('Plans', [])
+
+        self.assertTrue(any(name.startswith(index) for name in indexes),
+                        '{} not used, plan uses {}'.format(index, sorted(indexes) or 'no index'))
+
+    def test_feed(self):
+        feed = Article.objects.defer('search_vector').order_by('-publish_time')
+        cursor_position = feed.values_list('publish_time', flat=True)[1000]
+
+        self.assertUsesIndex(feed[:40], 'news_article_feed_idx')
+        self.assertUsesIndex(feed.filter(publish_time__lt=cursor_position)[:40], 'news_article_feed_idx')
+
+    def test_domain_and_language_feeds(self):
+        feed = Article.objects.defer('search_vector').order_by('-publish_time')
+        self.assertUsesIndex(feed.filter(domain='site7.com')[:40], 'news_article_domain_idx')
+        self.assertUsesIndex(feed.filter(language='de')[:40], 'news_article_language_idx')
+
+    def test_relations(self):
+        self.assertUsesIndex(ArticleSave.objects.filter(human_id=7).order_by('-created')[:40],
+                             'news_saved_by_human_idx')
+        self.assertUsesIndex(ArticleSave.objects.filter(article_id=7).values('human_id'),
+                             'news_article_saved_by_article_id_human_id')
+
+
 if __name__ == 'news':
     unittest.main()
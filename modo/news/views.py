@@ -1,38 +1,47 @@
-from django.db.models import Q
-from django.http import Http404
+from django.conf import settings
+from django.db.models import BinaryField, Case, F, When
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.datastructures import MultiValueDictKeyError
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from . import serializers
 from .management import tasks
-from .management.paginators import ArticlePaginator
+from .management.bodies import iter_json_with_text
+from .management.buffers import view_buffer
+from .management.feed import feed_cache
+from .management.filters import FeedFilter, FullTextSearchFilter
+from .management.paginators import ArticlePaginator, PersonalFeedPaginator
+from .management.personal import personal_feed
 from .management.summary import Summarizer
-from .models import Article
+from .models import Article, ArticleBody, ArticleKeyword
 
 
 class NewsView(ModelViewSet):
-    queryset = Article.objects.defer('text').order_by('-publish_time')
+    queryset = Article.objects.defer('search_vector').order_by('-publish_time')
     pagination_class = ArticlePaginator
-    filter_backends = [SearchFilter, OrderingFilter]
+    filter_backends = [FeedFilter, FullTextSearchFilter, OrderingFilter]
+    permission_classes = [permissions.AllowAny]
 
-    search_fields = ['title', 'keywords']
     ordering = ['-publish_time']
 
     def get_serializer_class(self):
         serializer_assignment = {
             'create': serializers.ArticleCreationSerializer,
             'list': serializers.ArticleHeadlineSerializer,
+            'personal': serializers.ArticleHeadlineSerializer,
             'summary': serializers.ArticleSummarySerializer,
             'get_primary_key': serializers.ArticlePKRetrievalSerializer,
             'pull_articles': serializers.ArticleTaskSerializer,
             'update_sources': serializers.ArticleTaskSerializer,
+            'task_status': serializers.ArticleTaskSerializer,
 
         }
 
@@ -45,10 +54,9 @@ class NewsView(ModelViewSet):
                 or self.action == 'update' \
                 or self.action == 'partial_update' \
                 or self.action == 'create':
-            permission_classes = [permissions.IsAdminUser]
-        else:
-            permission_classes = [permissions.AllowAny]
-        return [permission() for permission in permission_classes]
+            return [permissions.IsAdminUser()]
+        # Extra actions get the permission_classes given to their @action, the others allow anyone.
+        return super().get_permissions()
 
     @ensure_csrf_cookie
     def create(self, request, *args, **kwargs):
@@ -62,6 +70,7 @@ class NewsView(ModelViewSet):
                                            authors=data['authors'],
                                            publish_time=data['publish_time'],
                                            title_image=data['images'])
+            feed_cache.invalidate()
             return Response({'message': 'News story added.'})
         else:
             return Response({'error': serializer.errors})
@@ -77,54 +86,127 @@ class NewsView(ModelViewSet):
         title = article.title
         site_name = article.site_name
         article.delete()
+        feed_cache.invalidate()
         return Response({'message': '{0} from {1} is removed.'.format(title, site_name)})
 
+    def list(self, request, *args, **kwargs):
+        if not feed_cache.cacheable(request):
+            return self._list_headlines(request)
+        return feed_cache.get_or_render(request, lambda: self._list_headlines(request))
+
+    def _list_headlines(self, request):
+        # Headlines are serialized straight from .values() rows, with the ordering
+        # fields selected as well for the cursor.
+        serializer = serializers.fast_headline_serializer
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        rows = serializer.values(queryset, *[field.lstrip('-') for field in ordering])
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+
+        return Response(serializer.serialize(rows))
+
+    @action(methods=['get'], detail=False, permission_classes=[permissions.IsAuthenticated],
+            pagination_class=PersonalFeedPaginator)
+    def personal(self, request, *args, **kwargs):
+        """ Get recent articles ranked by current user's interest keywords and sources."""
+        ranking = personal_feed.ranking(request.user.identifier, request.user.interests)
+        page = self.paginate_queryset(ranking)
+
+        serializer = serializers.fast_headline_serializer
+        rows = {row['identifier']: row
+                for row in serializer.values(Article.objects.filter(identifier__in=page), 'identifier')}
+        return self.get_paginated_response(
+            serializer.serialize(rows[identifier] for identifier in page if identifier in rows))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        feed_cache.invalidate()
+
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            # The length of the text decides whether it is inlined or streamed, and texts
+            # to inline are loaded with the article.
+            return super().get_queryset().annotate(
+                text_length=F('body__length'),
+                body_content=Case(When(body__length__lte=settings.NEWS_BODY_STREAM_THRESHOLD,
+                                       then=F('body__content')), output_field=BinaryField()))
+        return super().get_queryset()
+
     def retrieve(self, request, *args, **kwargs):
         article = self.get_object()
-        article_data = self.get_serializer(article).data
-        article_data['views'] = article.viewed_by.count()
-        article_data['saves'] = article.saved_by.count()
+        serializer = self.get_serializer(article)
+
+        # Large texts are streamed after the other fields instead of being loaded whole.
+        streamed = article.text_length is not None and article.text_length > settings.NEWS_BODY_STREAM_THRESHOLD \
+            and request.accepted_renderer.format == 'json'
+        if streamed:
+            serializer.fields.pop('text')
+
+        article_data = serializer.data
+        article_data['views'] = article.views
+        article_data['saves'] = article.saves
+        article_data['shares'] = article.shares
+
+        if streamed:
+            return StreamingHttpResponse(
+                iter_json_with_text(JSONRenderer().render(article_data),
+                                    ArticleBody.objects.stream(article.identifier)),
+                content_type='application/json')
         return Response(article_data)
 
+    @action(methods=['get'], detail=True)
+    def text(self, request, *args, **kwargs):
+        """ Stream the text of the article as plain text."""
+        article = self.get_object()
+        if not ArticleBody.objects.filter(article_id=article.identifier).exists():
+            raise Http404
+
+        return StreamingHttpResponse(ArticleBody.objects.stream(article.identifier),
+                                     content_type='text/plain; charset=utf-8')
+
     @action(methods=['get'], detail=True, permission_classes=[permissions.IsAuthenticated])
-    def share(self, request):
+    def share(self, request, *args, **kwargs):
         """ Add the article to current user's list of shared articles."""
         try:
             article = self.get_object()
         except PermissionDenied as pd:
             return Response({'error': str(pd)})
 
-        article.shared_by.add(request.user)
+        Article.objects.add_relation('shared_by', article.identifier, request.user.identifier)
         return Response({'message': '"{}" is shared'.format(article.title)})
 
     @action(methods=['get'], detail=True, permission_classes=[permissions.IsAuthenticated])
-    def save(self, request):
+    def save(self, request, *args, **kwargs):
         """ Add the article to current user's list of saved articles."""
         try:
             article = self.get_object()
         except PermissionDenied as pd:
             return Response({'error': str(pd)})
 
-        if article.saved_by.filter(identifier=request.user.identifier).count() == 0:
-            # Check if the article is already saved by current user.
-            article.saved_by.add(request.user)
+        if Article.objects.add_relation('saved_by', article.identifier, request.user.identifier):
             return Response({'message': '"{}" is saved.'.format(article.title)})
         else:
-            article.saved_by.remove(request.user)
+            # The article was already saved by current user.
+            Article.objects.remove_relation('saved_by', article.identifier, request.user.identifier)
             return Response({'message': '"{}" is no longer saved.'.format(article.title)})
 
     @action(methods=['get'], detail=True, permission_classes=[permissions.IsAuthenticated])
-    def view(self, request):
+    def view(self, request, *args, **kwargs):
         """ Add the article to current user's list of viewed articles."""
         try:
-            article = self.get_object()
-        except PermissionDenied as pd:
-            return Response({'error': str(pd)})
+            article_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError as e:
+            return Response({'error': str(e)})
 
-        if article.viewed_by.filter(identifier=request.user.identifier).count() == 0:
-            # Check if the article is already viewed by current user.
-            article.viewed_by.add(request.user)
-            return Response({'message': '"{}" is viewd.'.format(article.title)})
+        # Views are written behind. Only views not recorded yet look the article up, by its primary key.
+        if not view_buffer.seen(article_id, request.user.identifier):
+            if not Article.objects.filter(identifier=article_id).exists():
+                raise Http404('No article matches the given query.')
+            view_buffer.record(article_id, request.user.identifier)
+        return Response({'message': 'View recorded.'})
 
     @action(methods=['post'], detail=False, permission_classes=[permissions.IsAdminUser])
     def get_primary_key(self, request):
@@ -140,36 +222,47 @@ class NewsView(ModelViewSet):
     @csrf_exempt
     @action(methods=['post'], detail=False)
     def pull_articles(self, *args, **kwargs):
-        """ Pull new articles from the internet. Avoid frequently making this request.
+        """ Enqueue pulling new articles from the internet. Avoid frequently making this request.
         """
-        tasks.pull_articles()
-        return Response({})
+        job = tasks.pull_articles.delay()
+        return Response({'job_id': job.id}, status=status.HTTP_202_ACCEPTED)
 
     @csrf_exempt
     @action(methods=['post'], detail=False)
     def update_sources(self, *args, **kwargs):
-        """ Update the list of news sources.
+        """ Enqueue updating the list of news sources.
         """
-        tasks.update_sources()
-        return Response({})
+        job = tasks.update_sources.delay()
+        return Response({'job_id': job.id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(methods=['get'], detail=False)
+    def task_status(self, request):
+        """ Get the status of a background job from its id in param jobId.
+        """
+        try:
+            job_id = request.query_params['jobId']
+        except MultiValueDictKeyError as e:
+            return Response({'error': str(e)})
+
+        return Response(tasks.job_status(job_id))
 
     @action(methods=['get'], detail=True)
     def summary(self, *args, **kwargs):
         """ Get the summary and keywords on the current article instance.
         """
-        article = self.get_object()
-        summary_data = self.get_serializer(article).data
-
-        keywords = summary_data['keywords']
-        related_articles = \
-            Article.objects.filter(Q(keywords__contains=keywords[:1])
-                                   | Q(keywords__contains=keywords[1:2])
-                                   | Q(keywords__contains=keywords[2:3])) \
-            .order_by('-publish_time')[:11] \
+        serializer = serializers.fast_summary_serializer
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row = serializer.values(self.get_queryset().filter(**{self.lookup_field: kwargs[lookup]})).first()
+        if row is None:
+            raise Http404('No article matches the given query.')
+        summary_data = serializer.to_representation(row)
+
+        related_ids = ArticleKeyword.objects.related(row['identifier'], row['keywords'], row['publish_time'])
+        related_articles = Article.objects.filter(identifier__in=related_ids) \
             .values('identifier', 'title', 'images', 'site_name', 'domain', 'publish_time')
 
-        related_articles = [related for related in list(related_articles)
-                            if related['identifier'] != article.identifier]
+        ranks = {identifier: rank for rank, identifier in enumerate(related_ids)}
+        related_articles = sorted(related_articles, key=lambda related: ranks[related['identifier']])
 
         summary_data['related'] = related_articles
 
@@ -181,16 +274,14 @@ class NewsView(ModelViewSet):
         """
         summarizer = Summarizer()
         data = request.query_params
-        print('numKeywords' in data)
-
-        summarizer.num_keywords = summarizer.num_keywords if 'numKeywords' not in data \
-            else data['numKeywords']
-        summarizer.min_wordcount = summarizer.min_wordcount if 'minWords' not in data \
-            else data['minWords']
-        summarizer.max_wordcount = summarizer.max_wordcount if 'maxWords' not in data \
-            else data['maxWords']
-        summarizer.default_ratio = summarizer.default_ratio if 'ratio' not in data \
-            else data['ratio']
+
+        try:
+            summarizer.num_keywords = int(data.get('numKeywords', summarizer.num_keywords))
+            summarizer.min_wordcount = int(data.get('minWords', summarizer.min_wordcount))
+            summarizer.max_wordcount = int(data.get('maxWords', summarizer.max_wordcount))
+            summarizer.default_ratio = float(data.get('ratio', summarizer.default_ratio))
+        except ValueError as e:
+            return Response({'error': str(e)})
 
         try:
             result = summarizer.fetch(data['sourceUrl'])
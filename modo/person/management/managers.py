@@ -52,7 +52,7 @@ class HumanManager(BaseUserManager):
         if 'sources' in human.interests:
             human.interests['sources'] += sources
         else:
-            human.interests[sources] = sources
+            human.interests['sources'] = sources
 
         if 'keywords' in human.interests:
             human.interests['keywords'] += keywords
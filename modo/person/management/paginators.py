@@ -4,3 +4,13 @@ from rest_framework.pagination import CursorPagination
 class UserPaginator(CursorPagination):
     page_size = 50
     ordering = '-registered_since'
+
+
+class HistoryPaginator(CursorPagination):
+    # Saved and viewed articles, most recent first.
+    page_size = 40
+    ordering = '-created'
+
+    def get_ordering(self, request, queryset, view):
+        # The ordering filter of the user view orders users, not their history.
+        return (self.ordering,)
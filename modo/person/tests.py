@@ -1,3 +1,50 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from news.models import Article, ArticleSave
+from .management.paginators import HistoryPaginator
+from .models import Human
+
+
+class HistoryTestCase(TestCase):
+    def setUp(self):
+        self.owner = Human.objects.create_user('reader', 'reader@example.com', 'password')
+        self.other = Human.objects.create_user('other', 'other@example.com', 'password')
+
+        saved = timezone.now() - timedelta(days=1)
+        self.articles = [Article.objects.create(url='https://example.com/news/{}'.format(i),
+                                                title='Headline {}'.format(i))
+                         for i in range(5)]
+        # Saved in an order unrelated to the order the articles were made in.
+        for minutes, article in zip([3, 0, 4, 1, 2], self.articles):
+            ArticleSave.objects.create(article=article, human=self.owner, created=saved + timedelta(minutes=minutes))
+
+        self.client = APIClient()
+
+    @mock.patch.object(HistoryPaginator, 'page_size', 2)
+    def test_saved_pages(self):
+        self.client.force_authenticate(self.owner)
+
+        pages = []
+        url = '/user/reader/saved/'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([article['title'] for article in response.data['results']])
+            self.assertEqual(set(response.data['results'][0]),
+                             {'identifier', 'url', 'authors', 'publish_time', 'images', 'title', 'description',
+                              'site_name', 'domain'})
+            url = response.data['next']
+
+        self.assertEqual(pages, [['Headline 2', 'Headline 0'], ['Headline 4', 'Headline 3'], ['Headline 1']])
+
+    def test_history_of_another_user(self):
+        self.client.force_authenticate(self.other)
 
-# Create your tests here.
+        self.assertEqual(self.client.get('/user/reader/saved/').status_code, 403)
+        self.assertEqual(self.client.get('/user/reader/viewed/').status_code, 403)
+        self.assertEqual(self.client.get('/user/other/saved/').data['results'], [])
@@ -1,3 +1,4 @@
+from django.db.models import F
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -7,11 +8,12 @@ from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from news.serializers import ArticleHeadlineSerializer
+from news.models import ArticleSave, ArticleView
+from news.serializers import fast_headline_serializer
 from .management import constants
 from .management.permissions import IsSelfOrAdmin
 from .forms import SignupForm
-from .management.paginators import UserPaginator
+from .management.paginators import HistoryPaginator, UserPaginator
 from .models import Human
 from .serializers import HumanSerializer
 
@@ -29,7 +31,8 @@ class HumanView(ModelViewSet):
     def get_permissions(self):
         if self.action == 'list':
             permission_classes = [permissions.IsAdminUser]
-        elif self.action == 'destroy' or self.action == 'partial_update':
+        elif self.action == 'destroy' or self.action == 'partial_update' \
+                or self.action == 'saved' or self.action == 'viewed':
             permission_classes = [IsSelfOrAdmin]
         else:
             permission_classes = [permissions.AllowAny]
@@ -87,29 +90,32 @@ class HumanView(ModelViewSet):
         human.delete()
         return Response({'email': email})
 
-    @action(methods=['get'], detail=True, permission_classes=[IsSelfOrAdmin])
-    def saved(self):
-        """ View a list of articles saved by the current user."""
-        try:
-            human = self.get_object()
-        except Http404 as e:
-            return Response({'errors': str(e)})
+    @action(methods=['get'], detail=True, permission_classes=[IsSelfOrAdmin],
+            pagination_class=HistoryPaginator)
+    def saved(self, request, *args, **kwargs):
+        """ View a page of articles saved by the user, most recently saved first."""
+        return self._history(ArticleSave)
 
-        saved_articles = human.saved.all()
-        serializer = ArticleHeadlineSerializer(saved_articles, many=True)
-        return Response(serializer.data)
+    @action(methods=['get'], detail=True, permission_classes=[IsSelfOrAdmin],
+            pagination_class=HistoryPaginator)
+    def viewed(self, request, *args, **kwargs):
+        """ View a page of articles viewed by the user, most recently viewed first."""
+        return self._history(ArticleView)
 
-    @action(methods=['get'], detail=True, permission_classes=[IsSelfOrAdmin])
-    def viewed(self):
-        """ View a list of articles saved by the current user."""
+    def _history(self, relation):
         try:
             human = self.get_object()
         except Http404 as e:
             return Response({'errors': str(e)})
 
-        saved_articles = human.viewd.all()
-        serializer = ArticleHeadlineSerializer(saved_articles, many=True)
-        return Response(serializer.data)
+        # A page is read from the (human, created) index and joined to its articles,
+        # selecting headline columns only, however long the history is.
+        serializer = fast_headline_serializer
+        rows = relation.objects.filter(human=human) \
+            .values('created', **{source: F('article__' + source) for source in serializer.sources})
+
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(serializer.serialize(page))
 
     @action(methods=['post'], detail=False, permission_classes=[permissions.IsAdminUser])
     def get_primary_key(self, request):